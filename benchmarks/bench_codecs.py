@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""Measures the snapshot throughput of every FileStorage format.
+
+Usage: ./benchmarks/bench_codecs.py [count ...]
+
+For each object count (100k by default) the store is filled with Places
+and Reviews, half each, with realistic attribute values. The snapshot is
+then written and read back in every available format: the JSON
+dictionary, the record file and each codec of models.engine.codec. The
+best encode and decode throughput in records per second and the file
+size are printed.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine import codec  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def fill(count):
+    """Stores count // 2 Places and as many Reviews of them"""
+    rand = random.Random(0)
+    FileStorage._FileStorage__objects = {}
+    places = []
+    for i in range(count // 2):
+        place = Place()
+        place.city_id = "city-{}".format(i % 500)
+        place.user_id = "user-{}".format(i % 5000)
+        place.name = "Cozy place {}".format(i)
+        place.description = "A quiet room near the center. " * 4
+        place.number_rooms = rand.randint(1, 6)
+        place.number_bathrooms = rand.randint(1, 3)
+        place.max_guest = rand.randint(1, 10)
+        place.price_by_night = rand.randint(20, 400)
+        place.latitude = rand.uniform(-60, 60)
+        place.longitude = rand.uniform(-180, 180)
+        place.amenity_ids = ["amenity-{}".format(a) for a in range(4)]
+        places.append(place)
+    for i in range(count - count // 2):
+        review = Review()
+        review.place_id = places[i % len(places)].id
+        review.user_id = "user-{}".format(i % 5000)
+        review.text = "Lovely stay, would come back. " * 3
+
+
+def best(func, repeat=3):
+    """Returns the best wall time of repeat calls of func"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(counts):
+    """Runs the benchmark for every object count"""
+    FileStorage._FileStorage__fsync = False
+    storage = FileStorage()
+    read = FileStorage._FileStorage__iter_snapshot
+    formats = ["json", "records"] + sorted(codec.CODECS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__file_path = path
+        print("{:>9} {:>8} {:>12} {:>12} {:>9}".format(
+            "objects", "format", "encode r/s", "decode r/s", "MiB"))
+        for count in counts:
+            fill(count)
+            for fmt in formats:
+                FileStorage._FileStorage__format = fmt
+                encode = best(storage.flush)
+                decode = best(lambda: sum(1 for _ in read(path)))
+                print("{:>9} {:>8} {:>12.0f} {:>12.0f} {:>9.1f}".format(
+                    count, fmt, count / encode, count / decode,
+                    os.path.getsize(path) / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100000])
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Compares the memory used per model instance with and without
+compact (slotted) models.
+
+Usage: ./benchmarks/bench_compact_models.py [count]
+
+Writes count Reviews (100k by default) to a snapshot file, then for
+normal and compact mode reloads it through FileStorage.reload() and
+prints the traced bytes each reloaded object keeps, right after the
+reload and again after a full save, which reads the attributes of every
+object.
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.base_model import BaseModel  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+
+
+def write_snapshot(path, count):
+    """Writes count Review records to the snapshot file at path"""
+    records = {}
+    for i in range(count):
+        key = str(uuid.uuid4())
+        records["Review." + key] = {
+            "__class__": "Review", "id": key,
+            "created_at": "2017-09-28T21:03:54.052298",
+            "updated_at": "2017-09-28T21:03:54.052302",
+            "place_id": "p{}".format(i % 1000),
+            "user_id": "u{}".format(i % 1000), "text": "Great stay"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+
+def bytes_per_object(storage, count, compact):
+    """Returns the traced memory per Review kept by reload(), and by
+    reload() followed by a full save"""
+    BaseModel._compact_mode = compact
+    FileStorage._FileStorage__objects = {}
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    storage.reload()
+    loaded = tracemalloc.get_traced_memory()[0]
+    storage.flush()
+    saved = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    FileStorage._FileStorage__objects = {}
+    return (loaded - before) / count, (saved - before) / count
+
+
+def main(count):
+    """Runs the benchmark for both modes"""
+    FileStorage._FileStorage__fsync = False
+    storage = FileStorage()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__file_path = path
+        write_snapshot(path, count)
+        normal = bytes_per_object(storage, count, False)
+        compact = bytes_per_object(storage, count, True)
+    print("{:>9} objects {:>12} {:>12}".format(count, "reload", "save"))
+    print("{:>17} {:>12.1f} {:>12.1f}".format("normal B/obj", *normal))
+    print("{:>17} {:>12.1f} {:>12.1f}".format("compact B/obj", *compact))
+    print("{:>17} {:>11.1f}% {:>11.1f}%".format(
+        "saved", *(100 * (n - c) / n for n, c in zip(normal, compact))))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Measures FileStorage write throughput with concurrent writer processes.
+
+Usage: ./benchmarks/bench_concurrent_writers.py [saves_per_writer]
+
+For 1, 4 and 16 writer processes sharing one file, each writer creates
+and saves Places one at a time (50 per writer by default), first with
+the snapshot file and then in journal mode. Every save takes the
+exclusive file lock; in snapshot mode it also merges what the other
+writers saved since. The total saves per second and the number of
+Places found afterwards, out of the number saved, are printed.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import models  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def writer(saves, start):
+    """Saves Places one at a time once every writer is ready"""
+    FileStorage._FileStorage__objects = {}
+    models.storage.reload()
+    start.wait()
+    for i in range(saves):
+        place = Place()
+        place.name = "Place {} of {}".format(i, os.getpid())
+        place.save()
+
+
+def run(writers, saves):
+    """Returns the wall time of writers processes saving saves Places
+    each, and the number of Places stored at the end"""
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(writers + 1)
+    processes = [context.Process(target=writer, args=(saves, start))
+                 for _ in range(writers)]
+    for process in processes:
+        process.start()
+    start.wait()
+    began = time.perf_counter()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+    FileStorage._FileStorage__objects = {}
+    models.storage.reload()
+    return elapsed, models.storage.count(Place)
+
+
+def main(saves):
+    """Runs the benchmark for every mode and number of writers"""
+    FileStorage._FileStorage__fsync = False
+    print("{:>8} {:>8} {:>10} {:>12}".format(
+        "mode", "writers", "saves/s", "kept"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for journal in (False, True):
+            FileStorage._FileStorage__journal = journal
+            for writers in (1, 4, 16):
+                path = os.path.join(tmp, "{}-{}.json".format(journal,
+                                                             writers))
+                FileStorage._FileStorage__file_path = path
+                elapsed, kept = run(writers, saves)
+                print("{:>8} {:>8} {:>10.0f} {:>12}".format(
+                    "journal" if journal else "snapshot", writers,
+                    writers * saves / elapsed,
+                    "{}/{}".format(kept, writers * saves)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
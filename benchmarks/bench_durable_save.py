@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""Measures the cost of durable FileStorage.save() calls.
+
+Usage: ./benchmarks/bench_durable_save.py [count ...]
+
+For each object count (10k, 100k and 1M by default) the store is filled
+with Places and saved with fsync off, fsync on, and fsync on plus a
+checksum footer. The timings are printed per save.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def time_save(storage, fsync, checksum, repeat=3):
+    """Returns the best wall time of repeat full saves"""
+    FileStorage._FileStorage__fsync = fsync
+    FileStorage._FileStorage__checksum = checksum
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.save()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(counts):
+    """Runs the benchmark for every object count"""
+    storage = FileStorage()
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        print("{:>9} {:>10} {:>10} {:>10} {:>9}".format(
+            "objects", "plain s", "fsync s", "crc s", "overhead"))
+        for count in counts:
+            FileStorage._FileStorage__objects = {}
+            for i in range(count):
+                place = Place()
+                place.name = "Place {}".format(i)
+                place.number_rooms = i % 5
+                place.price_by_night = i % 300
+            plain = time_save(storage, False, False)
+            durable = time_save(storage, True, False)
+            checked = time_save(storage, True, True)
+            print("{:>9} {:>10.4f} {:>10.4f} {:>10.4f} {:>8.1f}%".format(
+                count, plain, durable, checked,
+                100 * (checked - plain) / plain))
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000])
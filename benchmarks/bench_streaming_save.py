@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Measures the extra memory a full FileStorage.save() allocates.
+
+Usage: ./benchmarks/bench_streaming_save.py [count ...]
+
+For each object count (1M by default) the store is filled with new
+Places, which are saved under tracemalloc for the first time with the
+streaming writer, and then the way save() used to do it, building the
+whole {key: dictionary} document and handing it to json.dump, to a
+separate file. The peak of the memory allocated during each save and
+the memory it still holds afterwards are printed with its wall time.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def document_save(storage, path):
+    """Saves the store as one in-memory document, as save() used to"""
+    records = {key: obj.to_dict() for key, obj in storage.all().items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+
+def measure(save):
+    """Returns the peak and the retained traced memory in MiB and the
+    wall time of save()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    save()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, retained / 2 ** 20, elapsed
+
+
+def main(counts):
+    """Runs the benchmark for every object count"""
+    FileStorage._FileStorage__fsync = False
+    storage = FileStorage()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__file_path = path
+        print("{:>9} {:>13} {:>10} {:>6} {:>13} {:>10} {:>6}".format(
+            "objects", "streamed peak", "kept MiB", "s",
+            "document peak", "kept MiB", "s"))
+        for count in counts:
+            FileStorage._FileStorage__objects = {}
+            for i in range(count):
+                place = Place()
+                place.name = "Place {}".format(i)
+                place.number_rooms = i % 5
+                place.price_by_night = i % 300
+            streamed = measure(storage.save)
+            document = measure(lambda: document_save(
+                storage, os.path.join(tmp, "document.json")))
+            print("{:>9} {:>13.3f} {:>10.3f} {:>6.2f} {:>13.1f} {:>10.1f} "
+                  "{:>6.2f}".format(count, *streamed, *document))
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000000])
@@ -1,10 +1,215 @@
 #!/usr/bin/python3
 """Command interpreter for the AirBnB project"""
 
+import argparse
+import ast
 import cmd
+import copy
+import itertools
 import json
+import math
+import re
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
 from models import storage
 
+_QUOTED = r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''
+_QUOTED_TOKEN = re.compile(_QUOTED)
+_TOKEN = re.compile(_QUOTED + r"|\{.*\}|\[.*\]|\S+")
+_COMMAND = re.compile(
+    r"\s*(?:(\w*)\.(\w+)\((.*)\)|(\w+(?!\S)|\?)\s*(.*?)|)\s*$", re.S)
+_DOT_COMMANDS = frozenset(["all", "count", "destroy", "show", "update"])
+_DOT_ARG = re.compile(_QUOTED + r"|\{.*\}|\[.*\]|[^\s,{\[]+")
+_WHERE = re.compile(r"\s*\S+\s+where\b\s*")
+_CONDITION = re.compile(r"(\w+)\s*(==|!=|<=|>=|=|<|>)\s*(" + _QUOTED +
+                        r"|[^\s\"'{]+)\s*")
+_AND = re.compile(r"and\s+")
+_WHERE_CLAUSE = re.compile(r"where\s+")
+_ORDER_BY = re.compile(r"order\s+by\s+(\w+)(?:\s+(asc|desc)\b)?\s*")
+_PAGING = re.compile(r"(limit|offset)\s+(\d+)\s*")
+_OPTION = re.compile(r"--(limit|offset|cursor|format)(?:=(\S+))?$")
+_FORMATS = ("list", "jsonl")
+_READ_ONLY = ("id", "created_at", "updated_at", "__class__")
+
+
+class Command(namedtuple("Command", "name arg")):
+    """A parsed console line: the do_<name> method to run and its
+    argument string, the same for both notations"""
+    __slots__ = ()
+
+
+def parse_command(line):
+    """Parses "<command> <args>" or "<class>.<command>(<args>)" with one
+    precompiled pattern; returns the Command, Command("", "") for a blank
+    line, or None if line is neither form"""
+    match = _COMMAND.match(line)
+    if match is None:
+        return None
+    cls, dot, args, name, arg = match.groups()
+    if name == "?":
+        return Command("help", arg)
+    if name is not None:
+        return Command(name, arg)
+    if dot is not None:
+        if dot not in _DOT_COMMANDS:
+            return None
+        return Command(dot, " ".join([cls] + _DOT_ARG.findall(args)).strip())
+    return Command("", "")
+
+
+def split_args(arg):
+    """Splits a command line on whitespace, keeping quoted strings and
+    JSON lists and dictionaries in one piece"""
+    return _TOKEN.findall(arg)
+
+
+def split_options(text):
+    """Takes the --limit, --offset, --cursor and --format options out of
+    text, wherever they are; returns them as keyword arguments of
+    print_objects() and the rest of text. Raises ValueError"""
+    options = {}
+    rest = []
+    pos = 0
+    tokens = _TOKEN.finditer(text)
+    for token in tokens:
+        if not token.group().startswith("--"):
+            continue
+        match = _OPTION.match(token.group())
+        if match is None or match.group(1) in options:
+            raise ValueError("unexpected {}".format(token.group()))
+        rest.append(text[pos:token.start()])
+        name, value, pos = match.group(1), match.group(2), token.end()
+        if value is None:
+            token = next(tokens, None)
+            if token is None:
+                raise ValueError("--{} needs a value".format(name))
+            value, pos = token.group(), token.end()
+        options[name] = value
+    rest.append(text[pos:])
+    for name in ("limit", "offset"):
+        if name in options:
+            if not options[name].isdigit():
+                raise ValueError("--{} must be a number".format(name))
+            options[name] = int(options[name])
+    if options.get("format", "list") not in _FORMATS:
+        raise ValueError("unknown format {}".format(options["format"]))
+    if "format" in options:
+        options["fmt"] = options.pop("format")
+    return options, "".join(rest)
+
+
+def unquote(token):
+    """Returns token without one level of quotes if it is a quoted
+    string, so "id" and id name the same instance or attribute"""
+    if _QUOTED_TOKEN.fullmatch(token):
+        return ast.literal_eval(token)
+    return token
+
+
+def parse_conditions(cls, text, pos=0):
+    """Reads "<attribute><op><value> [and ...]" from text at pos, op being
+    one of = == != < <= > >=; returns the (attribute, op, value) list of
+    storage.query(), each value typed for cls, and the position after it.
+    Raises ValueError"""
+    conditions = []
+    while True:
+        match = _CONDITION.match(text, pos)
+        if match is None:
+            raise ValueError("expected <attribute><op><value>")
+        attr, op, value = match.groups()
+        conditions.append((attr, "==" if op == "=" else op,
+                           typed_value(cls, attr, parse_value(value))))
+        pos = match.end()
+        match = _AND.match(text, pos)
+        if match is None:
+            return conditions, pos
+        pos = match.end()
+
+
+def parse_query(cls, text):
+    """Reads the where, order by, limit and offset clauses of text, in any
+    order, into the keyword arguments of storage.query(). Raises
+    ValueError"""
+    query = {}
+    pos = len(text) - len(text.lstrip())
+    while pos < len(text):
+        match = _WHERE_CLAUSE.match(text, pos)
+        if match is not None and "conditions" not in query:
+            query["conditions"], pos = parse_conditions(cls, text,
+                                                        match.end())
+            continue
+        match = _ORDER_BY.match(text, pos)
+        if match is not None and "order_by" not in query:
+            query["order_by"] = match.group(1)
+            query["descending"] = match.group(2) == "desc"
+        else:
+            match = _PAGING.match(text, pos)
+            if match is None or match.group(1) in query:
+                raise ValueError("unexpected {}".format(text[pos:]))
+            query[match.group(1)] = int(match.group(2))
+        pos = match.end()
+    return query
+
+
+def parse_value(text):
+    """Returns the value of an update argument: a quoted string, an int,
+    a float, a JSON or Python literal list or dictionary, or else the
+    text itself. Nothing is evaluated; malformed literals raise
+    ValueError"""
+    first = text[:1]
+    if first in ("\"", "'") and len(text) > 1 and text[-1] == first:
+        if "\\" not in text:
+            return text[1:-1]
+        return _literal(text)
+    if first in ("[", "{"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return _literal(text)
+    if first.isdigit() or first in ("-", "+", "."):
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _literal(text):
+    """Returns the Python literal text, raising ValueError if it is not
+    one"""
+    try:
+        return ast.literal_eval(text)
+    except (SyntaxError, MemoryError, RecursionError):
+        raise ValueError("malformed value: {}".format(text))
+
+
+def typed_value(cls, name, value):
+    """Returns value converted to the type of the class attribute name of
+    cls (int, float, str or list), or unchanged if cls declares none;
+    raises ValueError if it cannot be converted, or is not a finite
+    number for a float attribute"""
+    kind = type(getattr(cls, name, None))
+    if kind in (int, float, str, list) and type(value) is not kind:
+        if kind is list or isinstance(value, (list, dict)):
+            raise ValueError("{} must be a {}".format(name, kind.__name__))
+        if kind is int and isinstance(value, float) and \
+                not value.is_integer():
+            raise ValueError("{} must be an int".format(name))
+        try:
+            value = kind(value)
+        except OverflowError:
+            raise ValueError("{} is out of range".format(name))
+    if kind is float and not math.isfinite(value):
+        raise ValueError("{} must be a finite number".format(name))
+    return value
+
+
 class HBNBCommand(cmd.Cmd):
     """Command interpreter class"""
 
@@ -15,25 +220,28 @@ class HBNBCommand(cmd.Cmd):
         pass
 
     def do_create(self, arg):
-        """Create a new instance of BaseModel, save it to the JSON file, and print the ID"""
+        """Usage: create <class>
+        Create a new class instance and print its id."""
         if not arg:
             print("** class name missing **")
             return
 
-        try:
-            new_instance = eval(arg)()
-            new_instance.save()
-            print(new_instance.id)
-        except NameError:
+        if arg not in storage.classes:
             print("** class doesn't exist **")
+            return
+
+        new_instance = storage.classes[arg]()
+        new_instance.save()
+        print(new_instance.id)
 
     def do_show(self, arg):
-        """Show string representation of an instance"""
+        """Usage: show <class> <id> or <class>.show(<id>)
+        Display the string representation of a class instance of a given id."""
         if not arg:
             print("** class name missing **")
             return
 
-        args = arg.split()
+        args = [unquote(a) for a in split_args(arg)]
         if args[0] not in storage.classes:
             print("** class doesn't exist **")
             return
@@ -42,20 +250,20 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        obj_dict = storage.all()
-        key = args[0] + "." + args[1]
-        if key in obj_dict:
-            print(obj_dict[key])
+        obj = storage.get(args[0], args[1])
+        if obj is not None:
+            print(obj)
         else:
             print("** no instance found **")
 
     def do_destroy(self, arg):
-        """Delete an instance"""
+        """Usage: destroy <class> <id> or <class>.destroy(<id>)
+        Delete a class instance of a given id."""
         if not arg:
             print("** class name missing **")
             return
 
-        args = arg.split()
+        args = [unquote(a) for a in split_args(arg)]
         if args[0] not in storage.classes:
             print("** class doesn't exist **")
             return
@@ -64,36 +272,126 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        obj_dict = storage.all()
-        key = args[0] + "." + args[1]
-        if key in obj_dict:
-            del obj_dict[key]
+        obj = storage.get(args[0], args[1])
+        if obj is not None:
+            storage.delete(obj)
             storage.save()
         else:
             print("** no instance found **")
 
     def do_all(self, arg):
-        """Print all string representations of instances"""
-        obj_dict = storage.all()
+        """Usage: all or all <class> or <class>.all()
+        Display string representations of all instances of a given class.
+        If no class is specified, displays all instantiated objects."""
+        # Also: all <class> near <latitude> <longitude> <radius_km>
+        #       all <class> within <south> <west> <north> <east>
+        #       all <class> [where <attribute><op><value> [and ...]]
+        #                   [order by <attribute> [asc|desc]]
+        #                   [limit <n>] [offset <n>]
+        # with the options --limit <n>, --offset <n>, --cursor <class>.<id>
+        # and --format list|jsonl anywhere on the line. When --limit
+        # leaves objects out, the next cursor is printed to stderr.
+        try:
+            options, arg = split_options(arg)
+        except ValueError:
+            print("** invalid option **")
+            return
+        args = arg.split()
 
-        if not arg:
-            print([str(obj_dict[obj]) for obj in obj_dict])
-        elif arg not in storage.classes:
+        if not args:
+            self.print_objects(storage.all().values(), **options)
+        elif args[0] not in storage.classes:
             print("** class doesn't exist **")
+        elif len(args) > 1 and args[1] in ("near", "within"):
+            self.geo_query(args, options)
+        elif len(args) > 1:
+            self.run_query(args[0], arg.split(None, 1)[1], options)
+        elif not storage.all(args[0]):
+            print("** no instance found **")
         else:
-            class_instances = [str(obj_dict[obj]) for obj in obj_dict if obj.startswith(arg + ".")]
-            if not class_instances:
-                print("** no instance found **")
+            self.print_objects(storage.all(args[0]).values(), **options)
+
+    def run_query(self, name, text, options):
+        """Print the instances of class name selected by the clauses of
+        text"""
+        try:
+            query = parse_query(storage.classes[name], text)
+        except ValueError:
+            print("** invalid query **")
+            return
+        self.print_objects(storage.query(name, **query), **options)
+
+    def print_objects(self, objs, limit=None, offset=0, cursor=None,
+                      fmt="list"):
+        """Print the objects of objs one at a time, as a list of their
+        strings or as one JSON dictionary per line. Objects up to the one
+        whose key is cursor and offset more are skipped, and printing
+        stops after limit; if objects remain, the key of the last one
+        printed is written to stderr as the next cursor"""
+        objs = iter(objs)
+        if cursor is not None:
+            for obj in objs:
+                if "{}.{}".format(type(obj).__name__, obj.id) == cursor:
+                    break
+        objs = itertools.islice(objs, offset, None)
+        write = sys.stdout.write
+        if fmt == "list":
+            write("[")
+        separator = ""
+        last = None
+        for obj in objs if limit is None else itertools.islice(objs, limit):
+            if fmt == "list":
+                write(separator + repr(str(obj)))
+                separator = ", "
             else:
-                print(class_instances)
+                write(json.dumps(obj.to_dict()) + "\n")
+            last = obj
+        if fmt == "list":
+            write("]\n")
+        if last is not None and limit is not None and \
+                next(objs, None) is not None:
+            print("cursor: {}.{}".format(type(last).__name__, last.id),
+                  file=sys.stderr)
+
+    def geo_query(self, args, options):
+        """Print the instances found by a near or within query of all"""
+        queries = {"near": (storage.near, 3), "within": (storage.within, 4)}
+        if args[1] not in queries or len(args) != 2 + queries[args[1]][1]:
+            print("** invalid query **")
+            return
+        try:
+            numbers = [float(a) for a in args[2:]]
+        except ValueError:
+            numbers = None
+        if numbers is None or not all(map(math.isfinite, numbers)):
+            print("** coordinates must be numbers **")
+            return
+        if not storage.classes[args[0]]._geo:
+            print("** class has no coordinates **")
+            return
+        found = queries[args[1]][0](args[0], *numbers)
+        self.print_objects(found.values(), **options)
+
+    def do_count(self, arg):
+        """Usage: count <class> or <class>.count()
+        Retrieve the number of instances of a given class."""
+        if not arg:
+            print("** class name missing **")
+            return
+        print(storage.count(arg.split()[0]))
 
     def do_update(self, arg):
-        """Update an instance's attributes"""
+        """Usage: update <class> <id> <attribute_name> <attribute_value> or
+       <class>.update(<id>, <attribute_name>, <attribute_value>) or
+       <class>.update(<id>, <dictionary>)
+        Update a class instance of a given id by adding or updating
+        a given attribute key/value pair or dictionary."""
         if not arg:
             print("** class name missing **")
             return
 
-        args = arg.split()
+        args = split_args(arg)
+        args[0] = unquote(args[0])
         if args[0] not in storage.classes:
             print("** class doesn't exist **")
             return
@@ -102,10 +400,13 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        obj_dict = storage.all()
-        key = args[0] + "." + args[1]
+        if args[1] == "where":
+            self.update_where(args[0], arg[_WHERE.match(arg).end():])
+            return
+        args[1:3] = [unquote(a) for a in args[1:3]]
 
-        if key not in obj_dict:
+        obj = storage.get(args[0], args[1])
+        if obj is None:
             print("** no instance found **")
             return
 
@@ -113,25 +414,146 @@ class HBNBCommand(cmd.Cmd):
             print("** attribute name missing **")
             return
 
+        if args[2].startswith("{"):
+            self.update_objects(args[0], [obj], args[2])
+            return
+
         if len(args) < 4:
             print("** value missing **")
             return
 
+        if args[2] in _READ_ONLY:
+            return
+
         try:
-            setattr(obj_dict[key], args[2], eval(args[3]))
-            storage.save()
+            value = typed_value(storage.classes[args[0]], args[2],
+                                parse_value(args[3]))
+        except ValueError:
+            print("** invalid value **")
+            return
+
+        try:
+            setattr(obj, args[2], value)
+            obj.save()
         except AttributeError:
             print("** attribute doesn't exist **")
 
+    def update_where(self, name, text):
+        """Applies the dictionary after the filter in text to every object
+        of class name matching the filter, and prints their number"""
+        try:
+            conditions, pos = parse_conditions(storage.classes[name], text)
+        except ValueError:
+            print("** invalid query **")
+            return
+        patch = text[pos:].strip()
+        if not patch:
+            print("** value missing **")
+            return
+        objs = list(storage.query(name, conditions))
+        if self.update_objects(name, objs, patch):
+            print(len(objs))
+
+    def update_objects(self, name, objs, text):
+        """Sets every attribute of the dictionary text on each object of
+        objs (of class name) and saves once; id and the timestamps are
+        left alone. Returns False if text is not a valid dictionary"""
+        try:
+            patch = parse_value(text)
+            if not isinstance(patch, dict) or \
+                    not all(isinstance(k, str) for k in patch):
+                raise ValueError("not a dictionary of attributes")
+            cls = storage.classes[name]
+            patch = {k: typed_value(cls, k, v) for k, v in patch.items()
+                     if k not in _READ_ONLY}
+        except ValueError:
+            print("** invalid value **")
+            return False
+        now = datetime.now()
+        for obj in objs:
+            for attr, value in patch.items():
+                if isinstance(value, (list, dict)):
+                    value = copy.deepcopy(value)
+                setattr(obj, attr, value)
+            obj.updated_at = now
+        storage.save()
+        return True
+
+    def onecmd(self, line):
+        """Runs the command of line, in the space or the dot notation,
+        from a single parse_command() pass"""
+        command = parse_command(line)
+        if command is None:
+            return self.default(line)
+        if not command.name:
+            return self.emptyline()
+        self.lastcmd = "" if command.name == "EOF" else line
+        func = getattr(self, "do_" + command.name, None)
+        if func is None:
+            return self.default(line)
+        return func(command.arg)
+
+    def run_batch(self, lines, commit_every=0):
+        """Runs the commands of lines without prompting, skipping blank
+        lines and # comments. Every save is deferred to a single write at
+        the end, or one write every commit_every commands. Returns the
+        number of commands run"""
+        commands = (line.strip() for line in lines)
+        commands = (line for line in commands
+                    if line and not line.startswith("#"))
+        count = 0
+        while True:
+            chunk = itertools.islice(commands, commit_every or None)
+            first = next(chunk, None)
+            if first is None:
+                return count
+            with storage.batch():
+                for line in itertools.chain([first], chunk):
+                    count += 1
+                    if self.onecmd(line):
+                        return count
+
     def do_quit(self, arg):
-        """Quit the command interpreter"""
+        """Quit command to exit the program."""
         return True
 
     def do_EOF(self, arg):
-        """Handle end of file (Ctrl-D)"""
+        """EOF signal to exit the program."""
         print()
         return True
 
+
+def main(argv):
+    """Runs the interpreter, or a batch of commands with --batch or
+    --no-autosave, reporting their rate on stderr"""
+    parser = argparse.ArgumentParser(description="HBNB command interpreter")
+    parser.add_argument("--batch", metavar="FILE",
+                        type=argparse.FileType("r", encoding="utf-8"),
+                        help="run the commands of FILE (- for stdin), "
+                             "saving once at the end, and exit")
+    parser.add_argument("--no-autosave", action="store_true",
+                        help="run the commands piped on stdin the same way")
+    parser.add_argument("--commit-every", type=int, default=0, metavar="K",
+                        help="in batch mode, save every K commands")
+    options = parser.parse_args(argv)
+    if options.commit_every < 0:
+        parser.error("argument --commit-every: K must be 0 or more")
+    console = HBNBCommand()
+    if options.batch is None and not options.no_autosave:
+        console.cmdloop()
+        return
+    lines = options.batch or sys.stdin
+    start = time.perf_counter()
+    try:
+        count = console.run_batch(lines, options.commit_every)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+    elapsed = time.perf_counter() - start
+    print("{} commands in {:.3f}s ({:.0f} commands/s)".format(
+        count, elapsed, count / elapsed if elapsed else 0), file=sys.stderr)
+
+
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
+    main(sys.argv[1:])
 
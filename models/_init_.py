@@ -1,8 +0,0 @@
-#!/usr/bin/python3
-"""__init__ magic method for models directory"""
-from models.engine.file_storage import FileStorage
-
-
-storage = FileStorage()
-storage.reload()
-
@@ -1,11 +1,71 @@
 #!/usr/bin/python3
 """Defines the BaseModel class."""
 
+import os
 import uuid
+import models
 from datetime import datetime
 
+
+def _parse_datetime(value):
+    """Return the datetime of an ISO 8601 string.
+
+    datetime.fromisoformat is implemented in C and reads everything
+    isoformat() writes, including values without microseconds; strptime
+    is only kept as a fallback for the legacy format.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+
 class BaseModel:
-    """Represents the BaseModel for the project."""
+    """Represents the BaseModel for the project.
+
+    _dirty is set whenever an attribute is assigned and cleared by the
+    storage once the instance is written; _cache holds the last
+    serialized dictionary when the storage is set to keep it. Both live
+    in slots so they never show up in __dict__, to_dict() or str().
+    In-place changes to mutable attributes are not detected; call save()
+    after them.
+
+    _indexes names the attributes the storage keeps a lookup index on,
+    _columns the ones it can copy into a columnar store and _geo the
+    latitude and longitude attributes of a spatial index; the storage is
+    told about every change to them through reindex().
+
+    When _compact_mode is on, instantiating a model returns an instance
+    of its compact() variant instead.
+
+    _registry maps the name of BaseModel and of every subclass, filled in
+    as each class is defined, to the class; the storages and the console
+    resolve class names through it.
+    """
+
+    __slots__ = ("__dict__", "_dirty", "_cache")
+    _indexes = ()
+    _columns = ()
+    _geo = ()
+    _watched = frozenset()
+    _compact_mode = os.getenv("HBNB_COMPACT_MODELS") == "1"
+    _registry = {}
+    __compact_classes = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """Register the class and collect the attributes whose changes
+        the storage must see."""
+        super().__init_subclass__(**kwargs)
+        cls._watched = frozenset(cls._indexes) | frozenset(cls._columns) | \
+            frozenset(cls._geo)
+        if "_fields" not in vars(cls):
+            BaseModel._registry[cls.__name__] = cls
+
+    def __new__(cls, *args, **kwargs):
+        """Create the instance, as the compact variant in compact mode."""
+        if BaseModel._compact_mode:
+            cls = cls.compact()
+        return object.__new__(cls)
 
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel.
@@ -14,6 +74,8 @@ class BaseModel:
             *args (any): Unused.
             **kwargs (dict): Key/value pairs of attributes.
         """
+        self._dirty = True
+        self._cache = None
         self.id = str(uuid.uuid4())
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
@@ -21,20 +83,121 @@ class BaseModel:
         if kwargs:
             for key, value in kwargs.items():
                 if key == 'created_at' or key == 'updated_at':
-                    setattr(self, key, datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f"))
-                else:
-                    setattr(self, key, value)
+                    self._init_attribute(key, _parse_datetime(value))
+                elif key != '__class__':
+                    self._init_attribute(key, value)
         else:
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed."""
+        if name in self._watched:
+            old = getattr(self, name)
+            object.__setattr__(self, name, value)
+            models.storage.reindex(self, name, old)
+        else:
+            object.__setattr__(self, name, value)
+        if name not in BaseModel.__slots__ and not self._dirty:
+            self._dirty = True
+            models.storage.mark_dirty(self)
+
+    def _init_attribute(self, name, value):
+        """Set an attribute from the kwargs of __init__; the instance is
+        not stored yet, so the storage is not told about it."""
+        object.__setattr__(self, name, value)
+
     def save(self):
         """Update updated_at with the current datetime."""
         self.updated_at = datetime.now()
+        models.storage.new(self)
         models.storage.save()
 
+    @classmethod
+    def compact(cls):
+        """Return a subclass of cls that keeps id, the timestamps and the
+        declared class attributes in slots instead of the instance dict.
+
+        The subclass has the same name as cls, so storage keys, str() and
+        to_dict() are unchanged. Ad-hoc attributes go to an overflow dict
+        in the _extra slot, allocated when the first one is set; the
+        instance __dict__ is never used. Unset fields read as the class
+        default; a list default is copied into the instance on first read
+        so it is never shared.
+        """
+        if "_fields" in vars(cls):
+            return cls
+        compact = BaseModel.__compact_classes.get(cls)
+        if compact is not None:
+            return compact
+        fields = ("id", "created_at", "updated_at") + tuple(
+            k for k, v in vars(cls).items()
+            if not k.startswith("_") and not callable(v)
+            and not isinstance(v, classmethod))
+
+        def __getattr__(self, name):
+            if name == "_extra":
+                return None
+            if name in fields and hasattr(cls, name):
+                value = getattr(cls, name)
+                if isinstance(value, list):
+                    value = list(value)
+                    object.__setattr__(self, name, value)
+                return value
+            extra = self._extra
+            if extra is not None and name in extra:
+                return extra[name]
+            raise AttributeError(name)
+
+        def __setattr__(self, name, value):
+            if name in fields or name in BaseModel.__slots__:
+                BaseModel.__setattr__(self, name, value)
+                return
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[name] = value
+            if not self._dirty:
+                self._dirty = True
+                models.storage.mark_dirty(self)
+
+        def _init_attribute(self, name, value):
+            if name in fields or name in BaseModel.__slots__:
+                object.__setattr__(self, name, value)
+                return
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[name] = value
+
+        def _attributes(self):
+            attrs = {}
+            for name in fields:
+                try:
+                    attrs[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+            if self._extra is not None:
+                attrs.update(self._extra)
+            return attrs
+
+        compact = type(cls.__name__, (cls,), {
+            "__slots__": fields + ("_extra",), "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__, "_fields": fields,
+            "__getattr__": __getattr__, "__setattr__": __setattr__,
+            "_init_attribute": _init_attribute, "_attributes": _attributes})
+        BaseModel.__compact_classes[cls] = compact
+        return compact
+
+    def _attributes(self):
+        """Return the instance attributes as a dictionary."""
+        return self.__dict__
+
+    @classmethod
+    def all(cls):
+        """Return the stored instances of this class keyed by <class>.id."""
+        return models.storage.all(cls)
+
     def to_dict(self):
         """Return a dictionary representation of the BaseModel instance."""
-        obj_dict = self.__dict__.copy()
+        obj_dict = dict(self._attributes())
         obj_dict['__class__'] = self.__class__.__name__
         obj_dict['created_at'] = self.created_at.isoformat()
         obj_dict['updated_at'] = self.updated_at.isoformat()
@@ -43,5 +206,7 @@ class BaseModel:
     def __str__(self):
         """Return the string representation of the BaseModel instance."""
         class_name = self.__class__.__name__
-        return "[{}] ({}) {}".format(class_name, self.id, self.__dict__
+        return "[{}] ({}) {}".format(class_name, self.id, self._attributes())
+
 
+BaseModel._registry["BaseModel"] = BaseModel
@@ -5,6 +5,7 @@ from models.base_model import BaseModel
 
 class City(BaseModel):
     """Represents a city."""
+    _indexes = ("state_id",)
     state_id = ""
     name = ""
 
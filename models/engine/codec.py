@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+"""
+Binary and fast-JSON codecs for the snapshot file.
+
+Layout of a snapshot written through a codec:
+    HEADER + codec name + newline
+    frames    one per object: <payload length> + the encoded (key, record)
+    end       an empty frame
+
+A snapshot without the header is a plain JSON dictionary, the default
+format, and is not handled here. A codec whose library is not installed
+is simply not registered.
+"""
+import io
+import pickle
+import struct
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+HEADER = b"#hbnb:"
+_FRAME = struct.Struct("<I")
+
+
+class PickleCodec:
+    """Pickles records and unpickles them without importing anything
+       outside a whitelist of plain value classes"""
+    name = "pickle"
+    safe_globals = frozenset([
+        ("datetime", "date"), ("datetime", "datetime"),
+        ("datetime", "time"), ("datetime", "timedelta"),
+        ("datetime", "timezone")])
+
+    def encode(self, key, value):
+        """Returns the bytes of the record"""
+        return pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        """Returns the (key, record) pair of data"""
+        return _SafeUnpickler(io.BytesIO(data)).load()
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    """Unpickler limited to PickleCodec.safe_globals"""
+
+    def find_class(self, module, name):
+        """Returns the class module.name if it is whitelisted"""
+        if (module, name) not in PickleCodec.safe_globals:
+            raise pickle.UnpicklingError(
+                "{}.{} is not allowed in a snapshot".format(module, name))
+        return super().find_class(module, name)
+
+
+class OrjsonCodec:
+    """Encodes records as JSON with orjson"""
+    name = "orjson"
+
+    def encode(self, key, value):
+        """Returns the bytes of the record"""
+        return orjson.dumps((key, value))
+
+    def decode(self, data):
+        """Returns the (key, record) pair of data"""
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """Encodes records as MessagePack"""
+    name = "msgpack"
+
+    def encode(self, key, value):
+        """Returns the bytes of the record"""
+        return msgpack.packb((key, value))
+
+    def decode(self, data):
+        """Returns the (key, record) pair of data"""
+        return msgpack.unpackb(data)
+
+
+CODECS = {codec.name: codec() for codec, module in (
+    (PickleCodec, pickle), (OrjsonCodec, orjson), (MsgpackCodec, msgpack))
+    if module is not None}
+
+
+def get(name):
+    """Returns the codec called name, or raises ValueError if it is
+    unknown or its library is not installed"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError("unknown or unavailable codec: {}".format(name))
+
+
+def write(out, name, items):
+    """Writes the (key, dictionary) pairs of items to the binary file out
+    with the codec called name, encoding one record at a time"""
+    codec = get(name)
+    out.write(HEADER + name.encode() + b"\n")
+    for key, value in items:
+        payload = codec.encode(key, value)
+        out.write(_FRAME.pack(len(payload)) + payload)
+    out.write(_FRAME.pack(0))
+
+
+def read(f):
+    """Yields the (key, dictionary) pairs of the binary file f, positioned
+    at the start of the header, decoding one record at a time"""
+    header = f.readline()
+    if not header.startswith(HEADER):
+        raise ValueError("missing codec header")
+    codec = get(header[len(HEADER):].strip().decode())
+    while True:
+        size = f.read(_FRAME.size)
+        if len(size) < _FRAME.size:
+            raise ValueError("truncated snapshot")
+        size, = _FRAME.unpack(size)
+        if not size:
+            return
+        payload = f.read(size)
+        if len(payload) < size:
+            raise ValueError("truncated snapshot")
+        key, value = codec.decode(payload)
+        yield key, value
@@ -0,0 +1,287 @@
+#!/usr/bin/python3
+"""
+Columnar copy of the declared attributes of one model class
+"""
+import operator
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnStore:
+    """Keeps the _columns of every object of a class in typed arrays,
+       one array per attribute, for filters and aggregates over the whole
+       class. Integers and floats are stored as such, an integer column
+       turning into a float one the first time it is given a number that
+       only a float can hold; any other attribute is dictionary encoded
+       into integer codes. The arrays are handed to numpy without a copy
+       when it is installed"""
+    __ops = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+             "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+    __typecodes = {int: "q", float: "d"}
+    __int_range = (-2 ** 63, 2 ** 63 - 1)
+
+    def __init__(self, cls):
+        """Creates an empty store for the _columns of cls"""
+        self.__keys = []
+        self.__rows = {}
+        self.__data = {}
+        self.__types = {}
+        self.__codes = {}
+        self.__values = {}
+        self.__inexact = {}
+        for field in cls._columns:
+            kind = type(getattr(cls, field))
+            self.__types[field] = kind
+            self.__data[field] = array(ColumnStore.__typecodes.get(kind, "q"))
+            if kind in ColumnStore.__typecodes:
+                self.__inexact[field] = set()
+            else:
+                self.__codes[field] = {}
+                self.__values[field] = []
+
+    def __len__(self):
+        """Returns the number of rows"""
+        return len(self.__keys)
+
+    def add(self, key, obj):
+        """Appends a row for the object obj stored under key"""
+        self.__rows[key] = len(self.__keys)
+        self.__keys.append(key)
+        for field in self.__data:
+            value = self.__encode(key, field, getattr(obj, field))
+            self.__data[field].append(value)
+
+    def remove(self, key):
+        """Removes the row of key by moving the last row into its place"""
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.__keys) - 1
+        if row != last:
+            moved = self.__keys[last]
+            self.__keys[row] = moved
+            self.__rows[moved] = row
+            for column in self.__data.values():
+                column[row] = column[last]
+        self.__keys.pop()
+        for column in self.__data.values():
+            column.pop()
+        for keys in self.__inexact.values():
+            keys.discard(key)
+
+    def set(self, key, field, value):
+        """Updates field in the row of key"""
+        row = self.__rows.get(key)
+        if row is not None and field in self.__data:
+            self.__data[field][row] = self.__encode(key, field, value)
+
+    def exact(self, field):
+        """Returns True if every row holds exactly the value of field, so
+        that a filter on the column cannot miss a matching object"""
+        return not self.__inexact.get(field)
+
+    def where(self, **conditions):
+        """Returns the keys of the rows matching every condition.
+
+        A condition is field=value, field=(op, value) with op one of
+        ==, !=, <, <=, >, >=, field=("between", low, high) or
+        field=("in", values).
+
+        Raises ValueError if a column of conditions is not exact.
+        """
+        self.__check_exact(conditions)
+        mask = self.__mask(conditions)
+        if mask is None:
+            return list(self.__keys)
+        if numpy is not None and isinstance(mask, numpy.ndarray):
+            return [self.__keys[i] for i in numpy.flatnonzero(mask)]
+        return list(compress(self.__keys, mask))
+
+    def aggregate(self, field, func="count", by=None, **conditions):
+        """Returns count, sum, mean, min or max of field over the rows
+        matching conditions, or a {group value: result} dictionary when
+        by names a column to group on. Raises ValueError if a column read
+        is not exact"""
+        self.__check_exact(list(conditions) + ([by] if by else []) +
+                           ([field] if func != "count" else []))
+        mask = self.__mask(conditions)
+        values = self.__decoded(field) if func != "count" else None
+        if by is None:
+            if func == "count":
+                if mask is None:
+                    return len(self.__keys)
+                if numpy is not None and isinstance(mask, numpy.ndarray):
+                    return int(numpy.count_nonzero(mask))
+                return sum(mask)
+            selected = list(values if mask is None
+                            else compress(values, mask))
+            return self.__reduce(func, selected)
+        if numpy is not None and func in ("count", "sum", "mean"):
+            return self.__numpy_groups(field, func, by, mask)
+        groups = {}
+        column = self.__decoded(by)
+        rows = range(len(self.__keys)) if mask is None \
+            else compress(range(len(self.__keys)), mask)
+        for row in rows:
+            groups.setdefault(column[row], []).append(
+                None if values is None else values[row])
+        return {g: len(v) if func == "count" else self.__reduce(func, v)
+                for g, v in groups.items()}
+
+    def __check_exact(self, fields):
+        """Raises ValueError if a number column of fields holds a value it
+        cannot represent, so filtering on it could give a wrong answer"""
+        for field in fields:
+            if not self.exact(field):
+                raise ValueError("{} holds values that are not numbers or "
+                                 "do not fit the column".format(field))
+
+    def __encode(self, key, field, value):
+        """Returns the array value stored for value in field of the row
+        of key. A number field stores the value converted, or 0 when it
+        cannot be, and the row is marked inexact unless that equals
+        value"""
+        kind = self.__types[field]
+        if kind is int and type(value) in (int, float) and \
+                not self.__fits_int(value):
+            self.__widen(field)
+            kind = float
+        if kind in ColumnStore.__typecodes:
+            try:
+                encoded = kind(value)
+            except (TypeError, ValueError, OverflowError):
+                encoded = kind()
+            if type(value) in (int, float) and encoded == value:
+                self.__inexact[field].discard(key)
+            else:
+                self.__inexact[field].add(key)
+            return encoded
+        codes = self.__codes[field]
+        if value not in codes:
+            codes[value] = len(self.__values[field])
+            self.__values[field].append(value)
+        return codes[value]
+
+    def __widen(self, field):
+        """Turns the integer column field into a float one, marking the
+        rows whose integer a float cannot hold inexact"""
+        column = array("d", self.__data[field])
+        for row, value in enumerate(self.__data[field]):
+            if column[row] != value:
+                self.__inexact[field].add(self.__keys[row])
+        self.__data[field] = column
+        self.__types[field] = float
+
+    @staticmethod
+    def __fits_int(value):
+        """Returns True if value can be stored in an integer column"""
+        low, high = ColumnStore.__int_range
+        if isinstance(value, float):
+            return value.is_integer() and low <= value <= high
+        return low <= value <= high
+
+    def __decoded(self, field):
+        """Returns the values of field, decoding dictionary codes"""
+        if field not in self.__data:
+            raise KeyError("{} is not a column".format(field))
+        if field in self.__values:
+            return [self.__values[field][c] for c in self.__data[field]]
+        return self.__data[field]
+
+    def __mask(self, conditions):
+        """Returns one boolean per row for conditions, as a list or a numpy
+        array, or None if there are no conditions"""
+        mask = None
+        for field, condition in conditions.items():
+            if not isinstance(condition, tuple):
+                condition = ("==", condition)
+            op, args = condition[0], condition[1:]
+            if field not in self.__data:
+                raise KeyError("{} is not a column".format(field))
+            if field in self.__values:
+                column = self.__data[field]
+                codes = self.__codes[field]
+                if op == "in":
+                    args = ({codes[v] for v in args[0] if v in codes},)
+                elif op in ("==", "!="):
+                    args = (codes.get(args[0], -1),)
+                else:
+                    column = self.__decoded(field)
+            else:
+                column = self.__data[field]
+            current = self.__compare(column, op, args)
+            if mask is None:
+                mask = current
+            elif numpy is not None:
+                mask = numpy.logical_and(mask, current)
+            else:
+                mask = [a and b for a, b in zip(mask, current)]
+        return mask
+
+    def __compare(self, column, op, args):
+        """Returns one boolean per value of column for op and args, as a
+        numpy array when the column can be compared with numpy"""
+        if numpy is not None and isinstance(column, array):
+            values = numpy.frombuffer(column, dtype=column.typecode)
+            if op == "between":
+                result = (values >= args[0]) & (values <= args[1])
+            elif op == "in":
+                result = numpy.isin(values, list(args[0]))
+            else:
+                result = ColumnStore.__ops[op](values, args[0])
+            return result
+        if op == "between":
+            return [args[0] <= v <= args[1] for v in column]
+        if op == "in":
+            return [v in args[0] for v in column]
+        compare = ColumnStore.__ops[op]
+        value = args[0]
+        return [compare(v, value) for v in column]
+
+    def __numpy_groups(self, field, func, by, mask):
+        """Returns count, sum or mean of field grouped by by, with numpy"""
+        if by in self.__values:
+            groups = self.__values[by]
+            codes = numpy.frombuffer(self.__data[by], dtype="q")
+        else:
+            groups, codes = numpy.unique(
+                numpy.frombuffer(self.__data[by],
+                                 dtype=self.__data[by].typecode),
+                return_inverse=True)
+            groups = groups.tolist()
+        weights = None
+        if func != "count":
+            weights = numpy.frombuffer(self.__data[field],
+                                       dtype=self.__data[field].typecode)
+        if mask is not None:
+            selected = numpy.array(mask, dtype=bool)
+            codes = codes[selected]
+            weights = None if weights is None else weights[selected]
+        counts = numpy.bincount(codes, minlength=len(groups))
+        if func == "count":
+            result = counts
+        else:
+            result = numpy.bincount(codes, weights=weights,
+                                    minlength=len(groups))
+            if func == "mean":
+                result = result / numpy.maximum(counts, 1)
+        return {groups[i]: result[i].item()
+                for i in range(len(groups)) if counts[i]}
+
+    @staticmethod
+    def __reduce(func, values):
+        """Returns func (sum, mean, min or max) of values"""
+        if func == "sum":
+            return sum(values)
+        if func == "mean":
+            return sum(values) / len(values) if values else None
+        if func == "min":
+            return min(values) if values else None
+        if func == "max":
+            return max(values) if values else None
+        raise ValueError("unknown aggregate {}".format(func))
@@ -0,0 +1,313 @@
+#!/usr/bin/python3
+"""
+Stores instances in a SQLite database, one table per class
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from models.engine import geo_index, query
+from models.base_model import BaseModel
+# importing the models registers them in BaseModel._registry
+from models.user import User  # noqa: F401
+from models.state import State  # noqa: F401
+from models.city import City  # noqa: F401
+from models.amenity import Amenity  # noqa: F401
+from models.place import Place  # noqa: F401
+from models.review import Review  # noqa: F401
+
+
+class DBStorage:
+    """Stores instances in a SQLite database with the same interface as
+       FileStorage. Loaded objects are kept in an identity map and changes
+       are written in one transaction on save()"""
+    __db_path = os.getenv("HBNB_SQLITE_PATH", "file.db")
+    classes = BaseModel._registry
+    __types = {int: "INTEGER", float: "REAL", str: "TEXT", list: "TEXT"}
+    __connection = None
+    __objects = {}
+    __dirty = {}
+    __batch_depth = 0
+
+    def all(self, cls=None):
+        """returns a dictionary of the stored objects, or only the objects
+        of cls (a class or class name)"""
+        if cls is None:
+            objs = {}
+            for name in DBStorage.classes:
+                objs.update(self.all(name))
+            return objs
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in DBStorage.classes:
+            return {}
+        rows = self.__connection.execute(
+            "SELECT * FROM {}".format(name))
+        return self.__merge(name, rows, {})
+
+    def count(self, cls=None):
+        """Returns the number of stored objects of cls (a class or class
+        name), or of every class, counted in SQL and corrected for the
+        unsaved new and deleted objects"""
+        if cls is None:
+            return sum(self.count(name) for name in DBStorage.classes)
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in DBStorage.classes:
+            return 0
+        total, = self.__connection.execute(
+            "SELECT COUNT(*) FROM {}".format(name)).fetchone()
+        for key, obj in DBStorage.__dirty.items():
+            table, id = key.split(".", 1)
+            if table == name:
+                saved = self.__connection.execute(
+                    "SELECT 1 FROM {} WHERE id = ?".format(name),
+                    (id,)).fetchone() is not None
+                total += (obj is not None) - saved
+        return total
+
+    def get(self, cls, id):
+        """Returns the object of cls (a class or class name) with id,
+        or None"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(name, id)
+        if key in DBStorage.__dirty:
+            return DBStorage.__dirty[key]
+        if key in DBStorage.__objects:
+            return DBStorage.__objects[key]
+        if name not in DBStorage.classes:
+            return None
+        row = self.__connection.execute(
+            "SELECT * FROM {} WHERE id = ?".format(name), (id,)).fetchone()
+        return None if row is None else self.__build(name, row)
+
+    def find(self, cls, **kwargs):
+        """Returns the objects of cls whose attributes equal kwargs,
+        filtering on the table columns in SQL"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in DBStorage.classes:
+            return {}
+        columns = self.__columns(DBStorage.classes[name])
+        where = [a for a in kwargs if a in columns or a == "id"]
+        sql = "SELECT * FROM {}".format(name)
+        if where:
+            sql += " WHERE " + " AND ".join("{} = ?".format(a) for a in where)
+        rows = self.__connection.execute(sql, [kwargs[a] for a in where])
+        return self.__merge(name, rows, kwargs)
+
+    def query(self, cls, conditions=(), order_by=None, descending=False,
+              limit=None, offset=0):
+        """Returns an iterator over the objects of cls matching every
+        (attribute, op, value) of conditions, sorted on order_by and paged
+        by offset and limit. Conditions on the id and the table columns
+        are filtered in SQL; the order, limit and offset are too when
+        every condition is and no unsaved change touches the class"""
+        query.check(conditions)
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in DBStorage.classes:
+            return iter(())
+        columns = set(self.__columns(DBStorage.classes[name])) | {"id"}
+        pushed = [(a, op, v) for a, op, v in conditions
+                  if a in columns and type(v) in (str, int, float)]
+        sql = "SELECT * FROM {}".format(name)
+        if pushed:
+            sql += " WHERE " + " AND ".join(
+                "{} {} ?".format(a, "=" if op == "==" else op)
+                for a, op, v in pushed)
+        params = [v for a, op, v in pushed]
+        if len(pushed) == len(conditions) and \
+                (order_by is None or order_by in columns) and \
+                not any(k.split(".", 1)[0] == name for k in DBStorage.__dirty):
+            if order_by is not None:
+                sql += " ORDER BY {} {}".format(
+                    order_by, "DESC" if descending else "ASC")
+            if limit is not None or offset:
+                sql += " LIMIT ? OFFSET ?"
+                params += [-1 if limit is None else limit, offset]
+            rows = self.__connection.execute(sql, params)
+            return (self.__build(name, row) for row in rows)
+        rows = self.__connection.execute(sql, params)
+        return query.select(self.__merge(name, rows, {}).values(),
+                            conditions, order_by, descending, limit, offset)
+
+    def within(self, cls, south, west, north, east):
+        """Returns the objects of cls (a class with _geo) inside the
+        bounding box, filtered in SQL; west may be greater than east for
+        a box that crosses the antimeridian"""
+        name, (lat, lon) = self.__geo(cls)
+        if west > east:
+            objs = self.within(name, south, west, north, 180.0)
+            objs.update(self.within(name, south, -180.0, north, east))
+            return objs
+        found = self.query(name, [(lat, ">=", south), (lat, "<=", north),
+                                  (lon, ">=", west), (lon, "<=", east)])
+        return {"{}.{}".format(name, obj.id): obj for obj in found}
+
+    def near(self, cls, lat, lon, radius_km):
+        """Returns the objects of cls (a class with _geo) within
+        radius_km of (lat, lon), nearest first, from the bounding box of
+        the circle filtered in SQL"""
+        name, attrs = self.__geo(cls)
+        south, north, ranges = geo_index.bounding_box(lat, lon, radius_km)
+        found = []
+        for west, east in ranges:
+            for key, obj in self.within(name, south, west, north,
+                                        east).items():
+                d = geo_index.distance_km(
+                    lat, lon, *(float(getattr(obj, a)) for a in attrs))
+                if d <= radius_km:
+                    found.append((d, key, obj))
+        found.sort(key=lambda f: f[:2])
+        return {key: obj for d, key, obj in found}
+
+    def new(self, obj):
+        """adds obj to the objects written by the next save()"""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        DBStorage.__objects[key] = obj
+        DBStorage.__dirty[key] = obj
+        obj._dirty = True
+
+    def mark_dirty(self, obj):
+        """Adds obj to the dirty set if it is stored"""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        if key in DBStorage.__objects:
+            DBStorage.__dirty[key] = obj
+
+    def reindex(self, obj, name, old):
+        """Nothing to do: the foreign key columns are indexed in SQL"""
+        pass
+
+    def delete(self, obj=None):
+        """Deletes obj from the storage on the next save()"""
+        if obj is None:
+            return
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        DBStorage.__objects.pop(key, None)
+        DBStorage.__dirty[key] = None
+
+    def save(self):
+        """Writes the changes since the last write, unless inside batch()"""
+        if not DBStorage.__batch_depth:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        """Defers every save() in the with block to a single transaction
+        when the outermost block exits"""
+        DBStorage.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            DBStorage.__batch_depth -= 1
+            if DBStorage.__batch_depth == 0:
+                self.flush()
+
+    def flush(self):
+        """Writes every new, changed or deleted object in one transaction"""
+        upserts = {}
+        deletes = {}
+        for key, obj in DBStorage.__dirty.items():
+            name, id = key.split(".", 1)
+            if obj is None:
+                deletes.setdefault(name, []).append((id,))
+            else:
+                upserts.setdefault(name, []).append(self.__row(obj))
+                obj._dirty = False
+        with self.__connection:
+            for name, rows in deletes.items():
+                self.__connection.executemany(
+                    "DELETE FROM {} WHERE id = ?".format(name), rows)
+            for name, rows in upserts.items():
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO {} VALUES ({})".format(
+                        name, ", ".join("?" * len(rows[0]))), rows)
+        DBStorage.__dirty.clear()
+
+    def reload(self):
+        """Opens the database, creating the tables and foreign key indexes
+        if needed, and forgets the loaded objects"""
+        if DBStorage.__connection is not None:
+            DBStorage.__connection.close()
+        DBStorage.__connection = sqlite3.connect(DBStorage.__db_path)
+        with DBStorage.__connection:
+            for name, cls in DBStorage.classes.items():
+                columns = ["id TEXT PRIMARY KEY", "created_at TEXT",
+                           "updated_at TEXT"]
+                for attr, value in self.__columns(cls).items():
+                    columns.append("{} {}".format(
+                        attr, DBStorage.__types[type(value)]))
+                columns.append("extra TEXT")
+                DBStorage.__connection.execute(
+                    "CREATE TABLE IF NOT EXISTS {} ({})".format(
+                        name, ", ".join(columns)))
+                for attr in cls._indexes:
+                    DBStorage.__connection.execute(
+                        "CREATE INDEX IF NOT EXISTS {0}_{1} "
+                        "ON {0} ({1})".format(name, attr))
+        DBStorage.__objects = {}
+        DBStorage.__dirty = {}
+
+    @staticmethod
+    def __geo(cls):
+        """Returns the name and the coordinate attributes of cls, or
+        raises ValueError if it has none"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if not DBStorage.classes[name]._geo:
+            raise ValueError("{} has no coordinates".format(name))
+        return name, DBStorage.classes[name]._geo
+
+    @staticmethod
+    def __columns(cls):
+        """Returns the declared attributes of cls and their defaults"""
+        return {k: v for k, v in vars(cls).items()
+                if not k.startswith("_") and type(v) in DBStorage.__types}
+
+    def __row(self, obj):
+        """Returns the column values of obj, in table order; attributes
+        still at their class default are written as that default, so SQL
+        filters see the values the object has"""
+        d = obj.to_dict()
+        row = [d.pop("id"), d.pop("created_at"), d.pop("updated_at")]
+        d.pop("__class__")
+        cls = DBStorage.classes[type(obj).__name__]
+        for attr, default in self.__columns(cls).items():
+            value = d.pop(attr, getattr(obj, attr, default))
+            if isinstance(default, list) and value is not None:
+                value = json.dumps(value)
+            row.append(value)
+        row.append(json.dumps(d) if d else None)
+        return tuple(row)
+
+    def __build(self, name, row):
+        """Returns the object for a table row, from the identity map
+        when it is already loaded"""
+        key = "{}.{}".format(name, row[0])
+        if key in DBStorage.__objects:
+            return DBStorage.__objects[key]
+        cls = DBStorage.classes[name]
+        kwargs = {"id": row[0], "created_at": row[1], "updated_at": row[2]}
+        for (attr, default), value in zip(self.__columns(cls).items(),
+                                          row[3:]):
+            if isinstance(default, list) and value is not None:
+                value = json.loads(value)
+            if value is not None and value != default:
+                kwargs[attr] = value
+        if row[-1] is not None:
+            kwargs.update(json.loads(row[-1]))
+        obj = cls(**kwargs)
+        obj._dirty = False
+        DBStorage.__objects[key] = obj
+        return obj
+
+    def __merge(self, name, rows, kwargs):
+        """Returns the objects of rows plus the unsaved objects of class
+        name, minus unsaved deletions, that match kwargs"""
+        objs = {}
+        for row in rows:
+            objs["{}.{}".format(name, row[0])] = self.__build(name, row)
+        for key, obj in DBStorage.__dirty.items():
+            if key.split(".", 1)[0] == name:
+                if obj is None:
+                    objs.pop(key, None)
+                else:
+                    objs[key] = obj
+        return {k: v for k, v in objs.items()
+                if all(getattr(v, a, None) == x for a, x in kwargs.items())}
@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+"""
+Advisory reader/writer locks shared between processes.
+
+A lock is held on a companion file next to the data, never on the data
+file itself, since the snapshot is replaced by a rename on every write.
+Locks come from fcntl.flock; where fcntl is not available they do
+nothing.
+"""
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def locked(path, exclusive=False):
+    """Holds a shared lock, or an exclusive one, on the file at path,
+    created if missing, for the with block. A lock is per open file, so
+    it must not be taken again by the process that holds it"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
@@ -2,43 +2,887 @@
 """
 Serializes instances to a JSON file and deserializes JSON file to instances
 """
+import atexit
+import functools
+import itertools
 import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 import models
+from models.engine import codec, file_lock, json_stream, query, record_file
+from models.engine.columns import ColumnStore
+from models.engine.geo_index import GeoIndex
+from models.base_model import BaseModel
+# importing the models registers them in BaseModel._registry
+from models.user import User  # noqa: F401
+from models.state import State  # noqa: F401
+from models.city import City  # noqa: F401
+from models.amenity import Amenity  # noqa: F401
+from models.place import Place  # noqa: F401
+from models.review import Review  # noqa: F401
+
+_lock = threading.RLock()
+
+
+def _synchronized(method):
+    """Runs method holding _lock, which a timed flush also takes, so the
+    flush never writes the store half way through a change"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            return method(*args, **kwargs)
+    return wrapper
 
 
 class FileStorage:
     """Serializes instances to a JSON file and deserializes
        JSON file to instances"""
+    classes = BaseModel._registry
     __file_path = 'file.json'
     __objects = {}
+    __journal = os.getenv("HBNB_STORAGE_JOURNAL") == "1"
+    __lazy = os.getenv("HBNB_STORAGE_LAZY") == "1"
+    __format = os.getenv("HBNB_STORAGE_FORMAT", "json")
+    __fsync = os.getenv("HBNB_STORAGE_FSYNC") != "0"
+    __checksum = os.getenv("HBNB_STORAGE_CHECKSUM") == "1"
+    __flush_every = int(os.getenv("HBNB_STORAGE_FLUSH_EVERY", "0"))
+    __flush_interval = float(os.getenv("HBNB_STORAGE_FLUSH_INTERVAL", "0"))
+    __on_demand = os.getenv("HBNB_STORAGE_ON_DEMAND") == "1"
+    __cache_records = os.getenv("HBNB_STORAGE_CACHE_RECORDS") == "1"
+    __progress_every = 10000
+    __last_flush = time.monotonic()
+    __timer = None
+    __batch_depth = 0
+    __exit_hook = False
+    __raw = {}
+    __snapshot = None
+    __loaded = set()
+    __unloaded = {}
+    __compact_every = 1000
+    __journal_size = 0
+    __dirty = {}
+    __by_class = {}
+    __by_attr = {}
+    __columns = {}
+    __geo = {}
+    __indexed = None
+    __compactor = None
+    __pending = None
+    __stamp = None
 
-    def all(self):
-        """returns the dictionary __objects"""
-        return FileStorage.__objects
+    @_synchronized
+    def all(self, cls=None):
+        """returns the dictionary __objects, or only the objects of cls
+        (a class or class name) from the per-class index"""
+        self.__check_indexes()
+        self.__settle()
+        if cls is None:
+            for name in list(FileStorage.__raw):
+                self.__hydrate_class(name)
+            if FileStorage.__snapshot is not None:
+                self.__hydrate_class("")
+            return FileStorage.__objects
+        name = cls if isinstance(cls, str) else cls.__name__
+        self.__hydrate_class(name)
+        return FileStorage.__by_class.get(name, {})
 
+    @_synchronized
+    def count(self, cls=None):
+        """Returns the number of stored objects of cls (a class or class
+        name), or of every class, built or not, without building any:
+        the per-class index, the unbuilt records and the record file
+        index each keep their own count"""
+        self.__check_indexes()
+        self.__settle()
+        if cls is None:
+            return sum(self.count(name) for name in
+                       set(FileStorage.__by_class) | set(FileStorage.__raw) |
+                       set(FileStorage.__unloaded))
+        name = cls if isinstance(cls, str) else cls.__name__
+        return len(FileStorage.__by_class.get(name, ())) + \
+            len(FileStorage.__raw.get(name, ())) + \
+            FileStorage.__unloaded.get(name, 0)
+
+    @_synchronized
+    def get(self, cls, id):
+        """Returns the object of cls (a class or class name) with id,
+        or None, building only that object if it is not loaded yet"""
+        self.__check_indexes()
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(name, id)
+        self.__settle(key)
+        raw = FileStorage.__raw.get(name)
+        if raw is not None and key in raw:
+            self.__load(raw.pop(key))
+        elif FileStorage.__snapshot is not None and \
+                key not in FileStorage.__loaded:
+            o = FileStorage.__snapshot.get(key)
+            if o is not None:
+                self.__load(o)
+        return FileStorage.__objects.get(key)
+
+    @_synchronized
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__check_indexes()
+        self.__settle()
+        FileStorage.__raw.get(type(obj).__name__, {}).pop(key, None)
+        if FileStorage.__snapshot is not None:
+            self.__mark_loaded(key)
+        old = FileStorage.__objects.get(key)
+        if old is not None:
+            self.__unindex(key, old)
         FileStorage.__objects[key] = obj
+        self.__index(key, obj)
+        FileStorage.__dirty[key] = obj
+        obj._dirty = True
+
+    @_synchronized
+    def mark_dirty(self, obj):
+        """Adds obj to the dirty set if it is stored"""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        if key in FileStorage.__objects:
+            FileStorage.__dirty[key] = obj
+
+    @_synchronized
+    def reindex(self, obj, name, old):
+        """Moves obj from the old to the current value of the indexed
+        attribute name and updates its row in the columnar store"""
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__check_indexes()
+        if FileStorage.__objects.get(key) is not obj:
+            return
+        store = FileStorage.__columns.get(type(obj).__name__)
+        if store is not None:
+            store.set(key, name, getattr(obj, name))
+        geo = FileStorage.__geo.get(type(obj).__name__)
+        if geo is not None and name in obj._geo:
+            geo.add(key, *(getattr(obj, a) for a in obj._geo))
+        if name not in obj._indexes:
+            return
+        index = FileStorage.__by_attr.setdefault((type(obj).__name__, name),
+                                                 {})
+        bucket = index.get(old)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del index[old]
+        index.setdefault(getattr(obj, name), {})[key] = obj
 
+    @_synchronized
+    def find(self, cls, **kwargs):
+        """Returns the objects of cls whose attributes equal kwargs, using
+        the attribute indexes declared in cls._indexes when possible"""
+        self.__check_indexes()
+        self.__settle()
+        name = cls if isinstance(cls, str) else cls.__name__
+        self.__hydrate_class(name)
+        candidates = None
+        for attr, value in kwargs.items():
+            index = FileStorage.__by_attr.get((name, attr))
+            if index is None:
+                continue
+            bucket = index.get(value, {})
+            if candidates is None or len(bucket) < len(candidates):
+                candidates = bucket
+        if candidates is None:
+            candidates = self.all(name)
+        return {k: v for k, v in candidates.items()
+                if all(getattr(v, a, None) == x for a, x in kwargs.items())}
+
+    @_synchronized
+    def query(self, cls, conditions=(), order_by=None, descending=False,
+              limit=None, offset=0):
+        """Returns an iterator over the objects of cls matching every
+        (attribute, op, value) of conditions, op being one of ==, !=, <,
+        <=, >, >=, sorted on order_by if given and paged by offset and
+        limit.
+
+        The candidates come from the smallest attribute index bucket of an
+        == condition, else from the columnar store when a condition
+        compares a numeric column with a number and every row of those
+        columns holds its value exactly, else from every object of cls;
+        each candidate is then checked against every condition.
+        """
+        query.check(conditions)
+        self.__check_indexes()
+        self.__settle()
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in FileStorage.classes:
+            return iter(())
+        cls = FileStorage.classes[name]
+        self.__hydrate_class(name)
+        candidates = None
+        for attr, op, value in conditions:
+            index = FileStorage.__by_attr.get((name, attr))
+            if op == "==" and index is not None:
+                bucket = index.get(value, {})
+                if candidates is None or len(bucket) < len(candidates):
+                    candidates = bucket
+        if candidates is not None:
+            candidates = list(candidates.values())
+        else:
+            numeric = {}
+            for attr, op, value in conditions:
+                if attr in cls._columns and attr not in numeric and \
+                        type(getattr(cls, attr)) in (int, float) and \
+                        type(value) in (int, float):
+                    numeric[attr] = (op, value)
+            store = self.columns(name) if numeric else None
+            if numeric and all(store.exact(attr) for attr in numeric):
+                objs = self.all(name)
+                candidates = (objs[key] for key in store.where(**numeric))
+            else:
+                candidates = self.all(name).values()
+        return query.select(candidates, conditions, order_by, descending,
+                            limit, offset)
+
+    @_synchronized
+    def columns(self, cls):
+        """Returns the columnar store of cls (a class with _columns),
+        building it on first use; it is kept up to date from then on"""
+        self.__check_indexes()
+        self.__settle()
+        name = cls if isinstance(cls, str) else cls.__name__
+        store = FileStorage.__columns.get(name)
+        if store is None:
+            store = ColumnStore(FileStorage.classes[name])
+            for key, obj in self.all(name).items():
+                store.add(key, obj)
+            FileStorage.__columns[name] = store
+        return store
+
+    @_synchronized
+    def within(self, cls, south, west, north, east):
+        """Returns the objects of cls (a class with _geo) inside the
+        bounding box, from the spatial index"""
+        geo = self.__geo_index(cls)
+        objs = self.all(cls)
+        return {key: objs[key] for key in geo.within(south, west,
+                                                     north, east)}
+
+    @_synchronized
+    def near(self, cls, lat, lon, radius_km):
+        """Returns the objects of cls (a class with _geo) within
+        radius_km of (lat, lon), nearest first"""
+        geo = self.__geo_index(cls)
+        objs = self.all(cls)
+        return {key: objs[key] for d, key in geo.near(lat, lon, radius_km)}
+
+    @_synchronized
+    def delete(self, obj=None):
+        """Deletes obj from __objects if it's inside"""
+        if obj is None:
+            return
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        self.__check_indexes()
+        self.__settle()
+        old = FileStorage.__objects.pop(key, None)
+        if old is not None:
+            self.__unindex(key, old)
+            FileStorage.__dirty[key] = None
+
+    @_synchronized
     def save(self):
-        """Serializes __objects to the JSON file"""
-        with open(FileStorage.__file_path, "w", encoding="utf-8") as f:
-            d = {k: v.to_dict() for k, v in FileStorage.__objects.items()}
-            json.dump(d, f)
+        """Writes the changes since the last write, unless they are
+        deferred by batch() or by the write-behind settings: with a
+        __flush_every dirty-count threshold or a __flush_interval in
+        seconds, the changes are written once that many are dirty or
+        that long after the last write, by a timer if nothing else is
+        saved by then, by flush(), or at interpreter exit"""
+        if FileStorage.__batch_depth or self.__defer():
+            return
+        self.flush()
 
-    def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+    @contextmanager
+    def batch(self):
+        """Defers every save() in the with block to a single write
+        when the outermost block exits"""
+        FileStorage.__batch_depth += 1
         try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(cls_name)(**o))
-        except FileNotFoundError:
-<<<<<<< HEAD
+            yield self
+        finally:
+            FileStorage.__batch_depth -= 1
+            if FileStorage.__batch_depth == 0:
+                self.flush()
+
+    @_synchronized
+    def flush(self):
+        """Serializes __objects to the JSON file, or appends the
+        changes since the last save to the journal in journal mode.
+
+        Both happen under an exclusive lock shared with other processes.
+        If another process rewrote the snapshot since this one last read
+        or wrote it, its records are merged in first, so its objects are
+        not lost: what it added, changed or deleted is taken unless this
+        process has an unsaved change to the same object."""
+        if FileStorage.__timer is not None:
+            FileStorage.__timer.cancel()
+            FileStorage.__timer = None
+        self.__settle()
+        FileStorage.__last_flush = time.monotonic()
+        if FileStorage.__journal:
+            with self.__locked(exclusive=True):
+                self.__append_journal()
+            if FileStorage.__journal_size >= FileStorage.__compact_every:
+                self.compact()
+            return
+        self.__wait_compaction()
+        with self.__locked(exclusive=True):
+            stamp = FileStorage.__file_stamp(FileStorage.__file_path)
+            if stamp is not None and stamp != FileStorage.__stamp:
+                self.__merge_snapshot()
+            FileStorage.__write_snapshot(FileStorage.__file_path,
+                                         self.__records(),
+                                         FileStorage.__format)
+            FileStorage.__stamp = \
+                FileStorage.__file_stamp(FileStorage.__file_path)
+        if FileStorage.__snapshot is not None and \
+                FileStorage.__format == "records":
+            FileStorage.__snapshot.close()
+            FileStorage.__snapshot = \
+                record_file.RecordFile(FileStorage.__file_path)
+            FileStorage.__loaded = set(FileStorage.__objects)
+            FileStorage.__raw = {}
+            self.__count_unloaded()
+        for path in self.__journal_paths():
+            if os.path.exists(path):
+                os.remove(path)
+        FileStorage.__journal_size = 0
+        FileStorage.__dirty.clear()
+
+    @_synchronized
+    def reload(self, *, progress=None, wait=None):
+        """Deserialize the JSON file __file_path to __objects, if it exists,
+        then replays any journal written since the last snapshot.
+
+        The snapshot is parsed one record at a time and each record is
+        stored as soon as it is read; the journal is read first so every
+        record is stored in its final state. progress, if given, is called
+        with the number of records stored every __progress_every records
+        and once at the end.
+
+        With wait=False (the default when __on_demand is set), reload()
+        returns before reading anything: get() reads on until it reaches
+        its key, and any other call reads the rest first.
+
+        In lazy mode the records are only indexed by class and key; each
+        object is built the first time all(), get() or find() reaches it.
+        A record file is memory mapped instead and read one record at a
+        time through its offset index.
+        """
+        self.__wait_compaction()
+        self.__check_indexes()
+        if FileStorage.__pending is not None:
+            FileStorage.__pending.close()
+            FileStorage.__pending = None
+        self.__close_snapshot()
+        FileStorage.__dirty.clear()
+        changes, deleted = {}, set()
+        FileStorage.__journal_size = 0
+        with self.__locked(exclusive=False):
+            for path in self.__journal_paths():
+                FileStorage.__journal_size += \
+                    FileStorage.__replay(path, changes, deleted.add)
+            for key in deleted:
+                self.__drop(key)
+            if FileStorage.__lazy and \
+                    record_file.is_record_file(FileStorage.__file_path):
+                FileStorage.__snapshot = \
+                    record_file.RecordFile(FileStorage.__file_path)
+                self.__count_unloaded()
+                records = iter(())
+            else:
+                records = FileStorage.__iter_snapshot(FileStorage.__file_path)
+                # reading the first record opens the file while the lock
+                # keeps it and the journal in step
+                records = itertools.chain(
+                    list(itertools.islice(records, 1)), records)
+            FileStorage.__stamp = \
+                FileStorage.__file_stamp(FileStorage.__file_path)
+        snapshot = ((k, o) for k, o in records
+                    if k not in changes and k not in deleted)
+        FileStorage.__pending = self.__restore(
+            itertools.chain(changes.items(), snapshot), progress)
+        if wait is None:
+            wait = not FileStorage.__on_demand
+        if wait:
+            self.__settle()
+
+    @_synchronized
+    def compact(self):
+        """Folds the journal into the snapshot file in a background thread"""
+        self.__settle()
+        if FileStorage.__compactor is not None and \
+                FileStorage.__compactor.is_alive():
+            return
+        compacting, journal = self.__journal_paths()
+        with self.__locked(exclusive=True):
+            if not os.path.exists(journal):
+                return
+            if os.path.exists(compacting):
+                with open(journal, encoding="utf-8") as src, \
+                        open(compacting, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(journal)
+            else:
+                os.replace(journal, compacting)
+        FileStorage.__journal_size = 0
+        FileStorage.__compactor = threading.Thread(
+            target=FileStorage.__fold,
+            args=(FileStorage.__file_path, compacting, FileStorage.__format))
+        FileStorage.__compactor.start()
+
+    @_synchronized
+    def export_json(self, path):
+        """Writes every stored object to path as one JSON dictionary"""
+        self.__settle()
+        with open(path, "w", encoding="utf-8") as f:
+            FileStorage.__dump_json(self.__records(), f)
+
+    @_synchronized
+    def import_json(self, path):
+        """Stores every object of the JSON dictionary at path"""
+        with open(path, encoding="utf-8") as f:
+            for key, o in json_stream.iter_items(f):
+                self.new(self.__load(o))
+
+    def __append_journal(self):
+        """Appends one line per new, changed or deleted object"""
+        if not FileStorage.__dirty:
+            return
+        with open(self.__journal_paths()[1], "a", encoding="utf-8") as f:
+            for key, obj in FileStorage.__dirty.items():
+                value = None if obj is None else self.__serialize(obj)
+                f.write(json.dumps({"key": key, "value": value}) + "\n")
+            if FileStorage.__fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        FileStorage.__journal_size += len(FileStorage.__dirty)
+        FileStorage.__dirty.clear()
+
+    def __defer(self):
+        """Returns True if save() should leave the changes in memory"""
+        every = FileStorage.__flush_every
+        interval = FileStorage.__flush_interval
+        if not every and not interval:
+            return False
+        if not FileStorage.__exit_hook:
+            atexit.register(self.__flush_at_exit)
+            FileStorage.__exit_hook = True
+        if every and len(FileStorage.__dirty) >= every:
+            return False
+        elapsed = time.monotonic() - FileStorage.__last_flush
+        if interval and elapsed >= interval:
+            return False
+        if interval and FileStorage.__timer is None:
+            FileStorage.__timer = threading.Timer(interval - elapsed,
+                                                  self.__flush_due)
+            FileStorage.__timer.daemon = True
+            FileStorage.__timer.start()
+        return True
+
+    def __flush_due(self):
+        """Writes the deferred changes from the timer __defer() started,
+        unless a flush since then already did"""
+        with _lock:
+            if FileStorage.__timer is not threading.current_thread():
+                return
+            FileStorage.__timer = None
+            if FileStorage.__dirty:
+                self.flush()
+
+    def __flush_at_exit(self):
+        """Writes the changes still deferred when the interpreter exits,
+        if saves are deferred at all by then"""
+        if (FileStorage.__flush_every or FileStorage.__flush_interval) \
+                and FileStorage.__dirty:
+            self.flush()
+
+    def __index(self, key, obj):
+        """Adds obj to the per-class and attribute indexes"""
+        name = key.split(".", 1)[0]
+        FileStorage.__by_class.setdefault(name, {})[key] = obj
+        store = FileStorage.__columns.get(name)
+        if store is not None:
+            store.add(key, obj)
+        geo = FileStorage.__geo.get(name)
+        if geo is not None:
+            geo.add(key, *(getattr(obj, a) for a in obj._geo))
+        for attr in obj._indexes:
+            index = FileStorage.__by_attr.setdefault((name, attr), {})
+            index.setdefault(getattr(obj, attr), {})[key] = obj
+
+    def __unindex(self, key, obj):
+        """Removes obj from the per-class and attribute indexes"""
+        name = key.split(".", 1)[0]
+        FileStorage.__by_class.get(name, {}).pop(key, None)
+        store = FileStorage.__columns.get(name)
+        if store is not None:
+            store.remove(key)
+        geo = FileStorage.__geo.get(name)
+        if geo is not None:
+            geo.remove(key)
+        for attr in obj._indexes:
+            index = FileStorage.__by_attr.get((name, attr), {})
+            bucket = index.get(getattr(obj, attr))
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del index[getattr(obj, attr)]
+
+    def __load(self, o):
+        """Builds and stores a clean object from its record o, which is
+        kept as its cached dictionary only with __cache_records"""
+        cls_name = o["__class__"]
+        del o["__class__"]
+        obj = FileStorage.classes[cls_name](**o)
+        self.new(obj)
+        if FileStorage.__cache_records:
+            o["__class__"] = cls_name
+            obj._cache = o
+        obj._dirty = False
+        FileStorage.__dirty.pop("{}.{}".format(cls_name, obj.id), None)
+        return obj
+
+    def __hydrate_class(self, name):
+        """Builds every record of class name not loaded yet, or of every
+        class from the record file if name is empty"""
+        raw = FileStorage.__raw.pop(name, None)
+        if raw:
+            for o in raw.values():
+                self.__load(o)
+        if FileStorage.__snapshot is not None:
+            prefix = name + "." if name else ""
+            for key, o in FileStorage.__snapshot.items(prefix):
+                if key not in FileStorage.__loaded:
+                    self.__load(o)
+
+    def __records(self):
+        """Yields (key, dictionary) for every stored record, built or not"""
+        for key, obj in FileStorage.__objects.items():
+            yield key, self.__serialize(obj)
+        for raw in FileStorage.__raw.values():
+            yield from raw.items()
+        if FileStorage.__snapshot is not None:
+            for key, o in FileStorage.__snapshot.items():
+                if key not in FileStorage.__loaded:
+                    yield key, o
+
+    def __restore(self, records, progress):
+        """Stores each (key, record) of records as it is read, building
+        it or, in lazy mode, keeping it in __raw, and yields its key"""
+        count = 0
+        for key, o in records:
+            if FileStorage.__lazy:
+                self.__drop(key)
+                FileStorage.__raw.setdefault(o["__class__"], {})[key] = o
+            else:
+                self.__load(o)
+            count += 1
+            if progress is not None and \
+                    count % FileStorage.__progress_every == 0:
+                progress(count)
+            yield key
+        FileStorage.__pending = None
+        if progress is not None:
+            progress(count)
+
+    def __settle(self, key=None):
+        """Reads the records a reload() left pending, all of them or only
+        up to key"""
+        pending = FileStorage.__pending
+        if pending is None or pending.gi_running:
+            return
+        try:
+            for loaded in pending:
+                if loaded == key:
+                    return
+        except BaseException:
+            FileStorage.__pending = None
+            raise
+
+    def __merge_snapshot(self):
+        """Takes in the records another process added, changed or deleted
+        in the snapshot file, except those with an unsaved change here"""
+        seen = set()
+        for key in self.__restore(self.__changed_records(seen), None):
             pass
-=======
+        for key in [k for k in self.__keys()
+                    if k not in seen and k not in FileStorage.__dirty]:
+            self.__drop(key)
+
+    def __changed_records(self, seen):
+        """Yields the (key, record) pairs of the snapshot file that differ
+        from the stored ones and have no unsaved change, adding every key
+        read to seen"""
+        for key, o in FileStorage.__iter_snapshot(FileStorage.__file_path):
+            seen.add(key)
+            if key in FileStorage.__dirty:
+                continue
+            obj = FileStorage.__objects.get(key)
+            if obj is None or self.__serialize(obj) != o:
+                yield key, o
+
+    def __keys(self):
+        """Yields the key of every stored record, built or not"""
+        yield from FileStorage.__objects
+        for raw in FileStorage.__raw.values():
+            yield from raw
+        if FileStorage.__snapshot is not None:
+            for key in FileStorage.__snapshot.keys():
+                if key not in FileStorage.__loaded:
+                    yield key
+
+    def __locked(self, exclusive):
+        """Returns the inter-process lock of the snapshot and journal"""
+        return file_lock.locked(FileStorage.__file_path + ".lock", exclusive)
+
+    def __close_snapshot(self):
+        """Unmaps the record file opened by a lazy reload"""
+        if FileStorage.__snapshot is not None:
+            FileStorage.__snapshot.close()
+            FileStorage.__snapshot = None
+        FileStorage.__loaded = set()
+        FileStorage.__unloaded = {}
+
+    def __mark_loaded(self, key):
+        """Adds key to the keys the record file no longer holds the
+        current record of, counting it out of the unbuilt records"""
+        if key in FileStorage.__loaded:
+            return
+        FileStorage.__loaded.add(key)
+        if key in FileStorage.__snapshot:
+            FileStorage.__unloaded[key.split(".", 1)[0]] -= 1
+
+    def __count_unloaded(self):
+        """Counts per class the records of the record file not built"""
+        snapshot = FileStorage.__snapshot
+        FileStorage.__unloaded = {
+            name: snapshot.count(name + ".") - sum(
+                1 for key in FileStorage.__by_class.get(name, ())
+                if key in FileStorage.__loaded)
+            for name in FileStorage.classes}
+
+    def __drop(self, key):
+        """Removes key from __objects and the indexes, if present"""
+        FileStorage.__raw.get(key.split(".", 1)[0], {}).pop(key, None)
+        if FileStorage.__snapshot is not None:
+            self.__mark_loaded(key)
+        old = FileStorage.__objects.pop(key, None)
+        if old is not None:
+            self.__unindex(key, old)
+
+    def __geo_index(self, cls):
+        """Returns the spatial index of cls, building it on first use"""
+        self.__check_indexes()
+        name = cls if isinstance(cls, str) else cls.__name__
+        geo = FileStorage.__geo.get(name)
+        if geo is None:
+            if not FileStorage.classes[name]._geo:
+                raise ValueError("{} has no coordinates".format(name))
+            geo = GeoIndex()
+            for key, obj in self.all(name).items():
+                geo.add(key, *(getattr(obj, a) for a in obj._geo))
+            FileStorage.__geo[name] = geo
+        return geo
+
+    def __check_indexes(self):
+        """Rebuilds the indexes if __objects was replaced from outside"""
+        if FileStorage.__indexed is FileStorage.__objects:
+            return
+        FileStorage.__indexed = FileStorage.__objects
+        if FileStorage.__pending is not None:
+            FileStorage.__pending.close()
+            FileStorage.__pending = None
+        FileStorage.__by_class = {}
+        FileStorage.__by_attr = {}
+        FileStorage.__columns = {}
+        FileStorage.__geo = {}
+        FileStorage.__raw = {}
+        self.__close_snapshot()
+        for key, obj in FileStorage.__objects.items():
+            self.__index(key, obj)
+
+    def __serialize(self, obj):
+        """Returns the dictionary of obj. With __cache_records it is kept
+        on obj and reused until obj is dirty again; otherwise it is built
+        each time and not kept, so a save holds one at a time"""
+        if not FileStorage.__cache_records:
+            obj._cache = None
+            obj._dirty = False
+            return obj.to_dict()
+        if obj._dirty or obj._cache is None:
+            obj._cache = obj.to_dict()
+            obj._dirty = False
+        return obj._cache
+
+    def __journal_paths(self):
+        """Returns the journal being compacted and the live journal"""
+        journal = FileStorage.__file_path + ".journal"
+        return (journal + ".compacting", journal)
+
+    def __wait_compaction(self):
+        """Blocks until a running compaction has finished"""
+        if FileStorage.__compactor is not None:
+            FileStorage.__compactor.join()
+            FileStorage.__compactor = None
+
+    @staticmethod
+    def __file_stamp(path):
+        """Returns what changes whenever the file at path is rewritten, or
+        None if there is no such file"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def __iter_snapshot(path):
+        """Yields the (key, raw dictionary) pairs stored in the snapshot
+        file one at a time, after checking its CRC-32 footer if it has
+        one. The format is told from the file itself: a record file, a
+        codec header or else a JSON dictionary"""
+        if record_file.is_record_file(path):
+            snapshot = record_file.RecordFile(path)
+            try:
+                yield from snapshot.items()
+            finally:
+                snapshot.close()
+            return
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
             return
->>>>>>> 9fb4bbc05dd47c787f4db6d0a0db374beb023d38
+        with f:
+            FileStorage.__check_footer(path, f)
+            f.seek(0)
+            if f.read(len(codec.HEADER)) == codec.HEADER:
+                f.seek(0)
+                yield from codec.read(f)
+                return
+        with open(path, encoding="utf-8") as f:
+            yield from json_stream.iter_items(f)
+
+    @staticmethod
+    def __check_footer(path, f):
+        """Raises ValueError if the snapshot file f ends with a CRC-32
+        footer that does not match its body, read in chunks"""
+        size = f.seek(0, os.SEEK_END)
+        footer = len("\n#crc32=00000000\n")
+        if size < footer:
+            return
+        f.seek(size - footer)
+        tail = f.read()
+        if not tail.startswith(b"\n#crc32="):
+            return
+        f.seek(0)
+        crc, left = 0, size - footer
+        while left:
+            chunk = f.read(min(left, 1 << 20))
+            crc = zlib.crc32(chunk, crc)
+            left -= len(chunk)
+        if int(tail[8:16], 16) != crc:
+            raise ValueError("{} is corrupt: checksum mismatch".format(path))
+
+    @staticmethod
+    def __write_snapshot(path, items, fmt):
+        """Writes the (key, dictionary) pairs of items to path in fmt.
+
+        The data goes to a temporary file that is synced and then renamed
+        over path, so a crash leaves either the old or the new snapshot,
+        and a mapped snapshot stays readable. Records are encoded one at
+        a time as items yields them, never as one document in memory.
+        fmt is json, records or the name of a codec from codec.CODECS.
+        """
+        tmp = path + ".tmp"
+        try:
+            if fmt == "records":
+                record_file.write(tmp, items, FileStorage.__fsync)
+            else:
+                with open(tmp, "wb") as f:
+                    out = _Crc32Writer(f)
+                    if fmt == "json":
+                        FileStorage.__dump_json(items, out)
+                    else:
+                        codec.write(out, fmt, items)
+                    if FileStorage.__checksum:
+                        f.write("\n#crc32={:08x}\n".format(out.crc).encode())
+                    if FileStorage.__fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        if FileStorage.__fsync:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def __dump_json(items, out):
+        """Writes the (key, dictionary) pairs of items to out as one JSON
+        dictionary, encoding a single record at a time"""
+        out.write("{")
+        separator = ""
+        for key, value in items:
+            out.write(separator + json.dumps(key) + ": " + json.dumps(value))
+            separator = ", "
+        out.write("}")
+
+    @staticmethod
+    def __replay(path, objdict, on_delete=None):
+        """Applies the journal at path to objdict, returns the record count"""
+        count = 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record["value"] is None:
+                        objdict.pop(record["key"], None)
+                        if on_delete is not None:
+                            on_delete(record["key"])
+                    else:
+                        objdict[record["key"]] = record["value"]
+                    count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    @staticmethod
+    def __fold(file_path, compacting, fmt):
+        """Writes snapshot + compacting journal as the new snapshot"""
+        with file_lock.locked(file_path + ".lock", exclusive=True):
+            if not os.path.exists(compacting):
+                return
+            objdict = dict(FileStorage.__iter_snapshot(file_path))
+            FileStorage.__replay(compacting, objdict)
+            FileStorage.__write_snapshot(file_path, objdict.items(), fmt)
+            os.remove(compacting)
+
+
+class _Crc32Writer:
+    """Writes text or bytes to a binary file and keeps their CRC-32"""
+
+    def __init__(self, f):
+        """Wraps the binary file f"""
+        self.f = f
+        self.crc = 0
+
+    def write(self, s):
+        """Writes s to the file, as UTF-8 if it is text"""
+        data = s.encode("utf-8") if isinstance(s, str) else s
+        self.crc = zlib.crc32(data, self.crc)
+        self.f.write(data)
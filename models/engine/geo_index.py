@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Grid index over latitude/longitude points
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Returns the great-circle (haversine) distance in kilometers"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + \
+        math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """Returns south, north and the (west, east) longitude ranges of a
+    box holding every point within radius_km of (lat, lon); the box is
+    split in two where it crosses the antimeridian"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat <= 1e-12 or dlat / cos_lat >= 180.0:
+        return south, north, [(-180.0, 180.0)]
+    dlon = dlat / cos_lat
+    west, east = lon - dlon, lon + dlon
+    if west < -180.0:
+        return south, north, [(west + 360.0, 180.0), (-180.0, east)]
+    if east > 180.0:
+        return south, north, [(west, 180.0), (-180.0, east - 360.0)]
+    return south, north, [(west, east)]
+
+
+class GeoIndex:
+    """Buckets keys by the grid cell of their point, so a bounding box or
+       radius query only looks at the points of the cells it overlaps"""
+
+    def __init__(self, cell_deg=0.1):
+        """Creates an empty index with square cells of cell_deg degrees"""
+        self.__cell_deg = cell_deg
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns the number of indexed points"""
+        return len(self.__points)
+
+    def add(self, key, lat, lon):
+        """Indexes key at (lat, lon), replacing its previous point; keys
+        whose coordinates are not finite numbers are left out"""
+        self.remove(key)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError, OverflowError):
+            return
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            return
+        cell = self.__cell(lat, lon)
+        self.__points[key] = (lat, lon, cell)
+        self.__cells.setdefault(cell, {})[key] = (lat, lon)
+
+    def remove(self, key):
+        """Removes key from the index"""
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        bucket = self.__cells[point[2]]
+        del bucket[key]
+        if not bucket:
+            del self.__cells[point[2]]
+
+    def within(self, south, west, north, east):
+        """Returns the keys inside the bounding box; west may be greater
+        than east for a box that crosses the antimeridian"""
+        if west > east:
+            return self.within(south, west, north, 180.0) + \
+                self.within(south, -180.0, north, east)
+        return [key for key, lat, lon in self.__scan(south, west, north, east)
+                if south <= lat <= north and west <= lon <= east]
+
+    def near(self, lat, lon, radius_km):
+        """Returns (distance in km, key) pairs of the points within
+        radius_km of (lat, lon), nearest first"""
+        south, north, ranges = bounding_box(lat, lon, radius_km)
+        found = []
+        for west, east in ranges:
+            for key, plat, plon in self.__scan(south, west, north, east):
+                d = distance_km(lat, lon, plat, plon)
+                if d <= radius_km:
+                    found.append((d, key))
+        found.sort()
+        return found
+
+    def __cell(self, lat, lon):
+        """Returns the grid cell of (lat, lon)"""
+        return (math.floor(lat / self.__cell_deg),
+                math.floor(lon / self.__cell_deg))
+
+    def __scan(self, south, west, north, east):
+        """Yields (key, lat, lon) for every point in the cells that
+        overlap the box, walking whichever is smaller: those cells or
+        the occupied ones"""
+        (x0, y0), (x1, y1) = self.__cell(south, west), self.__cell(north, east)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.__cells):
+            cells = (c for c in self.__cells
+                     if x0 <= c[0] <= x1 and y0 <= c[1] <= y1)
+        else:
+            cells = ((x, y) for x in range(x0, x1 + 1)
+                     for y in range(y0, y1 + 1))
+        for cell in cells:
+            for key, (lat, lon) in self.__cells.get(cell, {}).items():
+                yield key, lat, lon
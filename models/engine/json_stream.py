@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Incremental reader for a JSON dictionary too large to decode at once.
+
+The file is read in fixed-size chunks and each value is decoded as soon
+as it is complete, so memory holds one chunk and one value rather than
+the whole document and every decoded object.
+"""
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*")
+
+
+def iter_items(f, chunk_size=1 << 16):
+    """Yields the (key, value) pairs of the JSON dictionary read from the
+    text file f, in file order. Reading stops at the closing brace; a
+    malformed or truncated document raises ValueError"""
+    reader = _Reader(f, chunk_size)
+    if reader.char() != "{":
+        raise ValueError("expected a JSON dictionary")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str) or reader.char() != ":":
+            raise ValueError("expected a key at offset {}".format(reader.pos))
+        yield key, reader.value()
+        separator = reader.char()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError("expected , or }} at offset {}".format(
+                reader.pos))
+
+
+class _Reader:
+    """Buffers the chunks of a text file for the decoder"""
+
+    def __init__(self, f, chunk_size):
+        """Reads f chunk_size characters at a time"""
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Drops the consumed text and appends the next chunk"""
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def skip(self):
+        """Moves past whitespace, reading more text as needed"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self.fill()
+
+    def peek(self):
+        """Returns the next character that is not whitespace, consuming
+        it only if it is a closing brace"""
+        self.skip()
+        if self.pos >= len(self.buf):
+            raise ValueError("unexpected end of JSON data")
+        c = self.buf[self.pos]
+        if c == "}":
+            self.pos += 1
+        return c
+
+    def char(self):
+        """Consumes and returns the next character that is not whitespace"""
+        self.skip()
+        if self.pos >= len(self.buf):
+            raise ValueError("unexpected end of JSON data")
+        self.pos += 1
+        return self.buf[self.pos - 1]
+
+    def value(self):
+        """Decodes the next JSON value, reading until it is complete; a
+        number is only complete once a character that cannot continue
+        it has been read"""
+        self.skip()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.fill()
+                continue
+            if self.eof or \
+                    _NUMBER_TAIL.match(self.buf, end).end() < len(self.buf):
+                self.pos = end
+                return value
+            self.fill()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Filtering, ordering and paging shared by the storage query() methods
+"""
+import heapq
+import operator
+from itertools import islice
+
+OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+       "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def check(conditions):
+    """Raises ValueError if a condition is not (attribute, op, value) with
+    op one of OPS"""
+    for attr, op, value in conditions:
+        if op not in OPS:
+            raise ValueError("unknown operator {}".format(op))
+
+
+def matches(obj, conditions):
+    """Returns True if obj satisfies every condition; a value that cannot
+    be compared, or a missing attribute, does not match"""
+    for attr, op, value in conditions:
+        try:
+            if not OPS[op](getattr(obj, attr, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def sort_key(value):
+    """Orders numbers first, then strings, then anything else as text"""
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    if isinstance(value, str):
+        return (1, 0, value)
+    return (2, 0, "" if value is None else str(value))
+
+
+def select(objs, conditions=(), order_by=None, descending=False,
+           limit=None, offset=0):
+    """Returns an iterator over the objects of objs matching conditions,
+    sorted on order_by if given, skipping offset of them and stopping
+    after limit. With a limit, only offset + limit objects are kept while
+    sorting"""
+    found = (obj for obj in objs if matches(obj, conditions))
+    if order_by is not None:
+        def key(obj):
+            return sort_key(getattr(obj, order_by, None))
+        if limit is None:
+            found = iter(sorted(found, key=key, reverse=descending))
+        else:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            found = iter(pick(offset + limit, found, key=key))
+    stop = None if limit is None else offset + limit
+    return islice(found, offset, stop)
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""
+Reads and writes the offset-indexed record file format.
+
+Layout:
+    MAGIC
+    records   one per object: <key length, payload length> + key + JSON
+    index     fixed-width entries sorted by key: padded key + offset
+    footer    <index offset, record count> + MAGIC
+
+The index is binary searched straight from a memory map, so one record
+can be read without parsing or even touching the others.
+"""
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"HBNBREC\x01"
+KEY_WIDTH = 64
+_RECORD = struct.Struct("<HI")
+_ENTRY = struct.Struct("<{}sQ".format(KEY_WIDTH))
+_FOOTER = struct.Struct("<QQ8s")
+
+
+def is_record_file(path):
+    """Returns True if path exists and starts with the record file magic"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def write(path, items, fsync=False):
+    """Writes the (key, dictionary) pairs of items to path, syncing it to
+    disk before returning if fsync is True"""
+    index = []
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        offset = len(MAGIC)
+        for key, value in items:
+            raw_key = key.encode("utf-8")
+            if len(raw_key) > KEY_WIDTH:
+                raise ValueError("key too long: {}".format(key))
+            payload = json.dumps(value).encode("utf-8")
+            f.write(_RECORD.pack(len(raw_key), len(payload)))
+            f.write(raw_key)
+            f.write(payload)
+            index.append((raw_key.ljust(KEY_WIDTH, b"\0"), offset))
+            offset += _RECORD.size + len(raw_key) + len(payload)
+        index.sort()
+        for entry in index:
+            f.write(_ENTRY.pack(*entry))
+        f.write(_FOOTER.pack(offset, len(index), MAGIC))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class RecordFile:
+    """Read-only view of a record file through a memory map"""
+
+    def __init__(self, path):
+        """Maps the file at path and reads its footer"""
+        with open(path, "rb") as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(self.__map) - _FOOTER.size
+        self.__index, self.__count, magic = \
+            _FOOTER.unpack_from(self.__map, start)
+        if self.__map[:len(MAGIC)] != MAGIC or magic != MAGIC:
+            self.__map.close()
+            raise ValueError("{} is not a record file".format(path))
+
+    def __len__(self):
+        """Returns the number of records"""
+        return self.__count
+
+    def close(self):
+        """Unmaps the file"""
+        self.__map.close()
+
+    def get(self, key):
+        """Returns the dictionary stored under key, or None"""
+        raw_key = key.encode("utf-8").ljust(KEY_WIDTH, b"\0")
+        i = self.__lower_bound(raw_key)
+        if i < self.__count and self.__entry(i)[0] == raw_key:
+            return self.__record(self.__entry(i)[1])[1]
+        return None
+
+    def __contains__(self, key):
+        """Returns True if a record is stored under key"""
+        raw_key = key.encode("utf-8").ljust(KEY_WIDTH, b"\0")
+        i = self.__lower_bound(raw_key)
+        return i < self.__count and self.__entry(i)[0] == raw_key
+
+    def count(self, prefix=""):
+        """Returns the number of keys starting with prefix, from the
+        index alone"""
+        raw_prefix = prefix.encode("utf-8")
+        if not raw_prefix:
+            return self.__count
+        end = raw_prefix[:-1] + bytes([raw_prefix[-1] + 1])
+        return self.__lower_bound(end) - self.__lower_bound(raw_prefix)
+
+    def keys(self):
+        """Yields every key, in key order, from the index alone"""
+        for i in range(self.__count):
+            yield self.__entry(i)[0].rstrip(b"\0").decode("utf-8")
+
+    def items(self, prefix=""):
+        """Yields the (key, dictionary) pairs whose key starts with prefix,
+        in key order"""
+        raw_prefix = prefix.encode("utf-8")
+        i = self.__lower_bound(raw_prefix)
+        while i < self.__count:
+            raw_key, offset = self.__entry(i)
+            if not raw_key.startswith(raw_prefix):
+                break
+            yield self.__record(offset)
+            i += 1
+
+    def __entry(self, i):
+        """Returns the padded key and the offset of index entry i"""
+        return _ENTRY.unpack_from(self.__map, self.__index + i * _ENTRY.size)
+
+    def __lower_bound(self, raw_key):
+        """Returns the first index entry not less than raw_key"""
+        lo, hi = 0, self.__count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__entry(mid)[0] < raw_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __record(self, offset):
+        """Returns the key and the dictionary of the record at offset"""
+        key_len, size = _RECORD.unpack_from(self.__map, offset)
+        start = offset + _RECORD.size
+        key = self.__map[start:start + key_len].decode("utf-8")
+        start += key_len
+        return key, json.loads(self.__map[start:start + size])
@@ -5,6 +5,10 @@ from models.base_model import BaseModel
 
 class Place(BaseModel):
     """Represents a place."""
+    _indexes = ("city_id", "user_id")
+    _columns = ("city_id", "user_id", "number_rooms", "number_bathrooms",
+                "max_guest", "price_by_night", "latitude", "longitude")
+    _geo = ("latitude", "longitude")
     city_id = ""
     user_id = ""
     name = ""
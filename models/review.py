@@ -5,6 +5,7 @@ from models.base_model import BaseModel
 
 class Review(BaseModel):
     """Represents a review."""
+    _indexes = ("place_id", "user_id")
     place_id = ""
     user_id = ""
     text = ""
@@ -1,15 +1,11 @@
-import unittest
-from models.user import User
+#!/usr/bin/python3
+"""Defines the User class."""
 
-class TestUser(unittest.TestCase):
-    def test_user_initialization(self):
-        user = User()
-        self.assertIsInstance(user, User)
-
-    def test_user_email(self):
-        user = User(email="user@example.com")
-        self.assertEqual(user.email, "user@example.com")
-
-if __name__ == "__main__":
-    unittest.main()
+from models.base_model import BaseModel
 
+class User(BaseModel):
+    """Represents a user."""
+    email = ""
+    password = ""
+    first_name = ""
+    last_name = ""
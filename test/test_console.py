@@ -10,17 +10,44 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_update_values
+    TestHBNBCommand_batch
+    TestHBNBCommand_query
+    TestHBNBCommand_all_output
+    TestHBNBCommand_parse_command
 """
 import os
 import sys
+import ast
+import json
 import unittest
 from models import storage
+from models.engine.db_storage import DBStorage
 from models.engine.file_storage import FileStorage
-from console import HBNBCommand
+from console import HBNBCommand, Command, main, parse_command
+from console import parse_value, split_args, typed_value
+from models.place import Place
 from io import StringIO
 from unittest.mock import patch
 
 
+def reset_storage():
+    """Empties the storage of the console, whichever engine it uses"""
+    if isinstance(storage, DBStorage):
+        DBStorage._DBStorage__db_path = "test_console.db"
+        if os.path.exists("test_console.db"):
+            os.remove("test_console.db")
+        storage.reload()
+    else:
+        FileStorage._FileStorage__objects = {}
+
+
+def tearDownModule():
+    """Removes the database of the console tests on the db engine"""
+    if os.path.exists("test_console.db"):
+        os.remove("test_console.db")
+
+
 class TestHBNBCommand_prompting(unittest.TestCase):
     """Unittests for testing prompting of the HBNB command interpreter."""
 
@@ -134,6 +161,10 @@ class TestHBNBCommand_create(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -216,6 +247,10 @@ class TestHBNBCommand_show(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -469,6 +504,10 @@ class TestHBNBCommand_destroy(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -723,6 +762,10 @@ class TestHBNBCommand_all(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -869,6 +912,10 @@ class TestHBNBCommand_update(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -1501,6 +1548,468 @@ class TestHBNBCommand_update(unittest.TestCase):
         self.assertEqual(9.8, test_dict["latitude"])
 
 
+class TestHBNBCommand_update_values(unittest.TestCase):
+    """Unittests for testing how update parses and types its values."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        reset_storage()
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            self.key = "Place." + output.getvalue().strip()
+
+    def tearDown(self):
+        reset_storage()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def update(self, attr, value):
+        testCmd = "update {} {} {}".format(
+            self.key.replace(".", " "), attr, value)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+        return output.getvalue().strip()
+
+    def test_split_args(self):
+        self.assertEqual(["a", '"b c"', "'d e'", '{"f": [1, 2]}'],
+                         split_args('a "b c" \'d e\' {"f": [1, 2]}'))
+
+    def test_parse_value(self):
+        self.assertEqual("My Loft", parse_value('"My Loft"'))
+        self.assertEqual('say "hi"', parse_value('"say \\"hi\\""'))
+        self.assertEqual(98, parse_value("98"))
+        self.assertEqual(-7.2, parse_value("-7.2"))
+        self.assertEqual(["a", "b"], parse_value('["a", "b"]'))
+        self.assertEqual({"a": 1}, parse_value("{'a': 1}"))
+        self.assertEqual("plain", parse_value("plain"))
+        with self.assertRaises(ValueError):
+            parse_value("[__import__('os')]")
+
+    def test_typed_value(self):
+        self.assertEqual(3, typed_value(Place, "number_rooms", "3"))
+        self.assertEqual(4, typed_value(Place, "max_guest", 4.0))
+        self.assertIsInstance(typed_value(Place, "latitude", 7), float)
+        self.assertEqual("12", typed_value(Place, "name", 12))
+        self.assertEqual(12, typed_value(Place, "undeclared", 12))
+        for attr, value in (("number_rooms", "three"),
+                            ("number_rooms", 2.5), ("amenity_ids", "a"),
+                            ("name", ["a"])):
+            with self.assertRaises(ValueError):
+                typed_value(Place, attr, value)
+
+    def test_quoted_string_with_spaces(self):
+        self.assertEqual("", self.update("name", '"My big Loft"'))
+        self.assertEqual("My big Loft", storage.all()[self.key].name)
+
+    def test_declared_types(self):
+        self.update("number_rooms", '"3"')
+        self.update("latitude", "37")
+        self.update("amenity_ids", '["a", "b"]')
+        place = storage.all()[self.key]
+        self.assertEqual(3, place.number_rooms)
+        self.assertIsInstance(place.latitude, float)
+        self.assertEqual(["a", "b"], place.amenity_ids)
+
+    def test_invalid_value(self):
+        self.assertEqual("** invalid value **",
+                         self.update("number_rooms", "many"))
+        self.assertEqual(0, storage.all()[self.key].number_rooms)
+
+    def test_non_finite_floats(self):
+        for value in ("nan", "inf", "-inf", "1e400", '"nan"', "1" + "0" * 400):
+            self.assertEqual("** invalid value **",
+                             self.update("latitude", value))
+        self.assertEqual("** invalid value **",
+                         self.update("number_rooms", "1e400"))
+        self.assertEqual("** invalid value **",
+                         self.update("{'latitude': 1e400}", ""))
+        place = storage.all()[self.key]
+        self.assertEqual(0.0, place.latitude)
+        self.assertEqual(0, place.number_rooms)
+
+    def test_read_only_attributes(self):
+        place = storage.all()[self.key]
+        created_at = place.created_at
+        self.assertEqual("", self.update("created_at", '"x"'))
+        self.assertEqual("", self.update("id", "other"))
+        self.assertEqual(created_at, place.created_at)
+        self.assertEqual(self.key, "Place." + place.id)
+        storage.save()
+
+    def test_compact_model_types(self):
+        place = Place.compact()()
+        place.save()
+        self.key = "Place." + place.id
+        self.assertEqual("", self.update("number_rooms", '"3"'))
+        self.assertEqual(3, place.number_rooms)
+        self.assertEqual("** invalid value **",
+                         self.update("number_rooms", "many"))
+
+    def test_dictionary_saves_once(self):
+        place = storage.all()[self.key]
+        with patch.object(storage, "save") as save:
+            self.assertEqual("", self.update(
+                '{"name": "Loft", "max_guest": "4", "id": "x"}', ""))
+        save.assert_called_once_with()
+        self.assertEqual("Loft", place.name)
+        self.assertEqual(4, place.max_guest)
+        self.assertEqual(self.key, "Place." + place.id)
+
+    def test_dictionary_dot_notation(self):
+        testCmd = "Place.update({}, {{'name': 'Loft', 'latitude': 1}})"
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd(testCmd.format(self.key[6:]))
+        self.assertEqual("", output.getvalue().strip())
+        self.assertEqual(1.0, storage.all()[self.key].latitude)
+
+    def test_quoted_ids_and_attributes(self):
+        testId = self.key[6:]
+        place = storage.all()[self.key]
+        for testCmd in ('Place.update("{}", "name", "Loft")',
+                        'update Place "{}" "max_guest" 3',
+                        "Place.update('{}', {{'latitude': 2}})"):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd(testCmd.format(testId))
+            self.assertEqual("", output.getvalue().strip())
+        self.assertEqual("Loft", place.name)
+        self.assertEqual(3, place.max_guest)
+        self.assertEqual(2.0, place.latitude)
+        self.assertNotIn('"name"', place.__dict__)
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('Place.show("{}")'.format(testId))
+        self.assertEqual(str(place), output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('Place.destroy("{}")'.format(testId))
+        self.assertEqual("", output.getvalue().strip())
+        self.assertNotIn(self.key, storage.all())
+
+    def test_invalid_dictionary(self):
+        self.assertEqual("** invalid value **", self.update("{'a': }", ""))
+        self.assertEqual("** invalid value **",
+                         self.update('{"number_rooms": "x"}', ""))
+
+    def test_update_where(self):
+        places = [Place(), Place(), Place()]
+        places[0].city_id = places[1].city_id = "c1"
+        places[1].max_guest = 2
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch.object(storage, "save") as save:
+                HBNBCommand().onecmd('update Place where city_id="c1" '
+                                     '{"price_by_night": 120}')
+        save.assert_called_once_with()
+        self.assertEqual("2", output.getvalue().strip())
+        self.assertEqual([120, 120, 0],
+                         [p.price_by_night for p in places])
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("update Place where city_id=c1 and "
+                                 "max_guest=2 {'name': 'Two'}")
+        self.assertEqual("1", output.getvalue().strip())
+        self.assertEqual("Two", places[1].name)
+
+    def test_update_where_errors(self):
+        for testCmd, correct in (
+                ("update Place where", "** invalid query **"),
+                ("update Place where city_id", "** invalid query **"),
+                ("update Place where city_id=c1", "** value missing **"),
+                ("update Place where city_id=c1 [1]", "** invalid value **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd(testCmd)
+            self.assertEqual(correct, output.getvalue().strip())
+
+
+class TestHBNBCommand_batch(unittest.TestCase):
+    """Unittests for testing the batch mode of the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        reset_storage()
+
+    def tearDown(self):
+        reset_storage()
+        for path in ("file.json", "file.json.lock", "test_batch.cmds"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_run_batch_saves_once(self):
+        lines = ["create Place\n", "\n", "# comment\n", "create User\n"]
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch.object(storage, "flush") as flush:
+                self.assertEqual(2, HBNBCommand().run_batch(lines))
+        flush.assert_called_once_with()
+        self.assertEqual(2, len(output.getvalue().split()))
+        self.assertNotIn("(hbnb)", output.getvalue())
+
+    def test_run_batch_commit_every(self):
+        lines = ["create City"] * 5
+        with patch("sys.stdout", new=StringIO()):
+            with patch.object(storage, "flush") as flush:
+                self.assertEqual(5, HBNBCommand().run_batch(lines, 2))
+        self.assertEqual(3, flush.call_count)
+
+    def test_run_batch_commit_every_with_comments(self):
+        lines = ["# header", "create User", "", "create User",
+                 "# middle", "create User", "create User"]
+        with patch("sys.stdout", new=StringIO()):
+            with patch.object(storage, "flush") as flush:
+                self.assertEqual(4, HBNBCommand().run_batch(lines, 2))
+        self.assertEqual(2, flush.call_count)
+        self.assertEqual(4, len(storage.all("User")))
+
+    def test_run_batch_stops_on_quit(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertEqual(2, HBNBCommand().run_batch(
+                ["create State", "quit", "create State"], 1))
+        self.assertEqual(1, len(output.getvalue().split()))
+
+    def test_main_batch_file(self):
+        with open("test_batch.cmds", "w") as f:
+            f.write("create Amenity\ncreate Amenity\n")
+        with patch("sys.stdout", new=StringIO()), \
+                patch("sys.stderr", new=StringIO()) as error:
+            main(["--batch", "test_batch.cmds"])
+        self.assertIn("2 commands in", error.getvalue())
+        self.assertIn("commands/s", error.getvalue())
+        if not isinstance(storage, DBStorage):
+            FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(2, storage.count("Amenity"))
+
+    def test_main_invalid_arguments(self):
+        for argv in (["--batch", "test_missing.cmds"],
+                     ["--no-autosave", "--commit-every", "-1"]):
+            with patch("sys.stderr", new=StringIO()) as error:
+                with self.assertRaises(SystemExit):
+                    main(argv)
+            self.assertIn("error:", error.getvalue())
+
+    def test_main_no_autosave_reads_stdin(self):
+        with patch("sys.stdin", new=StringIO("create Review\n")), \
+                patch("sys.stdout", new=StringIO()) as output, \
+                patch("sys.stderr", new=StringIO()) as error:
+            main(["--no-autosave"])
+        self.assertIn("1 commands in", error.getvalue())
+        self.assertIn("Review." + output.getvalue().strip(), storage.all())
+
+
+class TestHBNBCommand_query(unittest.TestCase):
+    """Unittests for testing the query clauses of all."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        reset_storage()
+        self.places = []
+        for i, city in enumerate(["c1", "c1", "c2", "c1"]):
+            place = Place()
+            place.city_id = city
+            place.price_by_night = 40 * (i + 1)
+            place.name = "Place {}".format(i)
+            self.places.append(place)
+
+    def tearDown(self):
+        reset_storage()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def all(self, query):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all Place " + query))
+        return output.getvalue().strip()
+
+    def test_where_order_limit(self):
+        output = self.all("where city_id=c1 and price_by_night<160 "
+                          "order by price_by_night desc limit 1")
+        self.assertEqual(str([str(self.places[1])]), output)
+
+    def test_clauses_in_any_order(self):
+        output = self.all("limit 2 offset 1 order by price_by_night "
+                          "where city_id == \"c1\"")
+        self.assertEqual(str([str(self.places[1]), str(self.places[3])]),
+                         output)
+
+    def test_typed_comparison(self):
+        output = self.all('where price_by_night>="100" and name!="Place 3"')
+        self.assertEqual(str([str(self.places[2])]), output)
+
+    def test_no_match(self):
+        self.assertEqual("[]", self.all("where city_id=c3"))
+
+    def test_geo_query(self):
+        self.places[1].latitude = self.places[1].longitude = 10.0
+        self.places[1].save()
+        self.assertEqual(str([str(self.places[1])]),
+                         self.all("near 10 10 5"))
+        self.assertEqual(str([str(self.places[1])]),
+                         self.all("within 9 9 11 11"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all City near 10 10 5"))
+        self.assertEqual("** class has no coordinates **",
+                         output.getvalue().strip())
+
+    def test_geo_query_non_finite(self):
+        self.assertEqual("[]", self.all("near 10 10 5"))
+        for query in ("near 0 1e400 10", "near x 0 1", "within nan 0 1 1",
+                      "within 0 -1e400 10 1e400"):
+            self.assertEqual("** coordinates must be numbers **",
+                             self.all(query))
+
+    def test_invalid_query(self):
+        for query in ("where", "where city_id", "limit x", "limit 1 limit 2",
+                      "order price_by_night", "where price_by_night<many"):
+            self.assertEqual("** invalid query **", self.all(query))
+
+    def test_update_where_operators(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("update Place where price_by_night>100 "
+                                 "{'max_guest': 3}")
+        self.assertEqual("2", output.getvalue().strip())
+        self.assertEqual([0, 0, 3, 3], [p.max_guest for p in self.places])
+
+
+class TestHBNBCommand_all_output(unittest.TestCase):
+    """Unittests for testing the paging and formats of all."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        reset_storage()
+        self.places = [Place() for i in range(5)]
+
+    def tearDown(self):
+        reset_storage()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def all(self, arg):
+        with patch("sys.stdout", new=StringIO()) as output, \
+                patch("sys.stderr", new=StringIO()) as error:
+            self.assertFalse(HBNBCommand().onecmd("all " + arg))
+        return output.getvalue().strip(), error.getvalue().strip()
+
+    def test_limit_offset(self):
+        output, error = self.all("Place --limit 2 --offset=1")
+        self.assertEqual(str([str(p) for p in self.places[1:3]]), output)
+        self.assertEqual("cursor: Place." + self.places[2].id, error)
+
+    def test_cursor_pages(self):
+        seen = []
+        cursor = ""
+        while True:
+            output, error = self.all("Place --limit 2 " + cursor)
+            seen.extend(ast.literal_eval(output))
+            if not error:
+                break
+            cursor = "--cursor " + error.split()[1]
+        self.assertEqual([str(p) for p in self.places], seen)
+
+    def test_last_page_has_no_cursor(self):
+        output, error = self.all("--limit 5")
+        self.assertEqual(5, len(ast.literal_eval(output)))
+        self.assertEqual("", error)
+
+    def test_jsonl(self):
+        output, error = self.all("Place --format jsonl --limit 2")
+        lines = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([p.to_dict() for p in self.places[:2]], lines)
+
+    def test_options_with_query(self):
+        self.places[3].max_guest = 4
+        output, error = self.all("Place where max_guest=4 --format=jsonl")
+        self.assertEqual(self.places[3].id, json.loads(output)["id"])
+
+    def test_streams_without_building_a_list(self):
+        written = []
+        with patch("sys.stdout") as stdout:
+            stdout.write.side_effect = written.append
+            HBNBCommand().onecmd("all Place")
+        self.assertEqual(["["] + [", " * (i > 0) + repr(str(p))
+                                  for i, p in enumerate(self.places)] +
+                         ["]\n"], written)
+
+    def test_invalid_options(self):
+        for arg in ("Place --limit", "Place --limit x", "--offset -1",
+                    "--format xml", "--size 3", "--limit 1 --limit 2"):
+            self.assertEqual(("** invalid option **", ""), self.all(arg))
+
+
+class TestHBNBCommand_parse_command(unittest.TestCase):
+    """Unittests for testing the command parser of the interpreter."""
+
+    def test_space_notation(self):
+        self.assertEqual(Command("show", "User 1"),
+                         parse_command("  show   User 1 "))
+        self.assertEqual(Command("quit", ""), parse_command("quit"))
+        self.assertEqual(Command("help", "all"), parse_command("? all"))
+        self.assertEqual(Command("", ""), parse_command("   "))
+
+    def test_dot_notation(self):
+        self.assertEqual(Command("all", "User"), parse_command("User.all()"))
+        self.assertEqual(Command("all", ""), parse_command(".all()"))
+        self.assertEqual(Command("show", "User 1"),
+                         parse_command("User.show(1)"))
+        self.assertEqual(Command("update", 'Place 1 name "My, Loft"'),
+                         parse_command('Place.update(1, name, "My, Loft")'))
+        self.assertEqual(Command("update", "Place 1 {'a': [1, 2]}"),
+                         parse_command("Place.update(1, {'a': [1, 2]})"))
+
+    def test_unknown_syntax(self):
+        self.assertIsNone(parse_command("User.create()"))
+        self.assertIsNone(parse_command("User.show(1"))
+        self.assertIsNone(parse_command("# comment"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("User.create()"))
+            self.assertFalse(HBNBCommand().onecmd("nope 1"))
+        self.assertEqual("*** Unknown syntax: User.create()\n"
+                         "*** Unknown syntax: nope 1",
+                         output.getvalue().strip())
+
+
 class TestHBNBCommand_count(unittest.TestCase):
     """Unittests for testing count method of HBNB comand interpreter."""
 
@@ -1510,7 +2019,7 @@ class TestHBNBCommand_count(unittest.TestCase):
             os.rename("file.json", "tmp")
         except IOError:
             pass
-        FileStorage._FileStorage__objects = {}
+        reset_storage()
 
     @classmethod
     def tearDown(self):
@@ -1518,6 +2027,10 @@ class TestHBNBCommand_count(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
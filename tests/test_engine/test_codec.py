@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/codec.py.
+
+Unittest classes:
+    TestCodec
+"""
+import io
+import pickle
+import unittest
+from datetime import datetime
+from models.engine import codec
+
+
+class TestCodec(unittest.TestCase):
+    """Unittests for testing the snapshot codecs."""
+
+    def setUp(self):
+        self.items = [
+            ("Place.1", {"__class__": "Place", "id": "1", "name": "Loft",
+                         "number_rooms": 3, "latitude": 37.77,
+                         "amenity_ids": ["a", "b"]}),
+            ("Review.2", {"__class__": "Review", "id": "2", "text": "é"}),
+        ]
+
+    def write(self, name, items):
+        out = io.BytesIO()
+        codec.write(out, name, items)
+        out.seek(0)
+        return out
+
+    def test_round_trip_every_codec(self):
+        self.assertIn("pickle", codec.CODECS)
+        for name in codec.CODECS:
+            with self.subTest(codec=name):
+                out = self.write(name, iter(self.items))
+                self.assertTrue(out.getvalue().startswith(codec.HEADER))
+                self.assertEqual(
+                    self.items,
+                    [(k, v) for k, v in codec.read(out)])
+
+    def test_empty(self):
+        self.assertEqual([], list(codec.read(self.write("pickle", []))))
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.get("xml")
+        with self.assertRaises(ValueError):
+            list(codec.read(io.BytesIO(b"#hbnb:xml\n")))
+
+    def test_truncated(self):
+        data = self.write("pickle", self.items).getvalue()
+        for end in (len(data) - 1, len(data) - 10):
+            with self.assertRaises(ValueError):
+                list(codec.read(io.BytesIO(data[:end])))
+
+    def test_pickle_whitelist(self):
+        pickled = codec.CODECS["pickle"]
+        when = datetime(2017, 9, 28, 21, 3, 54)
+        self.assertEqual(("k", {"at": when}),
+                         pickled.decode(pickled.encode("k", {"at": when})))
+        with self.assertRaises(pickle.UnpicklingError):
+            pickled.decode(pickle.dumps(("k", {"f": io.BytesIO})))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/columns.py.
+
+Unittest classes:
+    TestColumnStore
+    TestColumnStore_no_numpy
+    TestColumnStore_storage
+"""
+import unittest
+import models
+from models.engine import columns
+from models.engine.columns import ColumnStore
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestColumnStore(unittest.TestCase):
+    """Unittests for testing filters and aggregates of ColumnStore."""
+
+    def setUp(self):
+        self.store = ColumnStore(Place)
+        rows = [("c1", 2, 80, 10.0), ("c1", 4, 120, 11.0),
+                ("c2", 6, 60, 50.0), ("c2", 1, 100, 12.0)]
+        for i, (city_id, max_guest, price, latitude) in enumerate(rows):
+            place = Place(id=str(i), city_id=city_id, max_guest=max_guest,
+                          price_by_night=price, latitude=latitude)
+            self.store.add("Place.{}".format(i), place)
+
+    def test_len(self):
+        self.assertEqual(4, len(self.store))
+
+    def test_where(self):
+        self.assertEqual(["Place.1", "Place.2"],
+                         self.store.where(max_guest=(">=", 4)))
+        self.assertEqual(["Place.0", "Place.1"],
+                         self.store.where(city_id="c1"))
+        self.assertEqual(["Place.1"], self.store.where(
+            max_guest=(">=", 4), latitude=("between", 9.5, 12.5)))
+        self.assertEqual([], self.store.where(city_id="c9"))
+        self.assertEqual(["Place.0", "Place.2"],
+                         self.store.where(price_by_night=("in", [60, 80])))
+
+    def test_where_unknown_column(self):
+        with self.assertRaises(KeyError):
+            self.store.where(name="Loft")
+
+    def test_aggregate(self):
+        self.assertEqual(4, self.store.aggregate("price_by_night"))
+        self.assertEqual(360, self.store.aggregate("price_by_night", "sum"))
+        self.assertEqual(60, self.store.aggregate("price_by_night", "min"))
+        self.assertEqual(2, self.store.aggregate(
+            "price_by_night", "count", max_guest=(">=", 4)))
+
+    def test_aggregate_by(self):
+        self.assertEqual({"c1": 100.0, "c2": 80.0}, self.store.aggregate(
+            "price_by_night", "mean", by="city_id"))
+        self.assertEqual({"c1": 120, "c2": 100}, self.store.aggregate(
+            "price_by_night", "max", by="city_id"))
+        self.assertEqual({"c2": 1}, self.store.aggregate(
+            "price_by_night", "count", by="city_id", max_guest=(">", 4)))
+
+    def test_set_and_remove(self):
+        self.store.set("Place.0", "price_by_night", 200)
+        self.assertEqual(["Place.0"],
+                         self.store.where(price_by_night=(">", 150)))
+        self.store.remove("Place.0")
+        self.assertEqual(3, len(self.store))
+        self.assertEqual([], self.store.where(price_by_night=(">", 150)))
+        self.assertEqual(["Place.3"], self.store.where(max_guest=1))
+
+    def test_inexact_values(self):
+        self.assertTrue(self.store.exact("price_by_night"))
+        self.store.set("Place.0", "price_by_night", 2 ** 70 + 1)
+        self.assertFalse(self.store.exact("price_by_night"))
+        self.store.set("Place.0", "price_by_night", 80)
+        self.assertTrue(self.store.exact("price_by_night"))
+        self.store.set("Place.1", "latitude", "north")
+        self.assertFalse(self.store.exact("latitude"))
+        with self.assertRaises(ValueError):
+            self.store.where(latitude=(">", 0))
+        with self.assertRaises(ValueError):
+            self.store.aggregate("latitude", "sum")
+        with self.assertRaises(ValueError):
+            self.store.aggregate("price_by_night", by="latitude")
+        self.assertEqual(4, self.store.aggregate("latitude"))
+        self.assertEqual(["Place.0", "Place.1"],
+                         self.store.where(city_id="c1"))
+        self.store.remove("Place.1")
+        self.assertTrue(self.store.exact("latitude"))
+        self.assertTrue(self.store.exact("city_id"))
+
+    def test_float_widens_int_column(self):
+        self.store.set("Place.0", "price_by_night", 99.5)
+        self.assertTrue(self.store.exact("price_by_night"))
+        self.assertEqual(["Place.0", "Place.1", "Place.3"],
+                         self.store.where(price_by_night=(">", 99)))
+        self.assertEqual(379.5,
+                         self.store.aggregate("price_by_night", "sum"))
+        self.assertEqual({"c1": 109.75, "c2": 80.0}, self.store.aggregate(
+            "price_by_night", "mean", by="city_id"))
+        place = Place(id="4", city_id="c3", price_by_night=10)
+        self.store.add("Place.4", place)
+        self.assertEqual(10, self.store.aggregate("price_by_night", "min"))
+
+    def test_widening_keeps_large_ints_inexact(self):
+        self.store.set("Place.0", "price_by_night", 2 ** 60 + 1)
+        self.assertTrue(self.store.exact("price_by_night"))
+        self.store.set("Place.1", "price_by_night", 0.5)
+        self.assertFalse(self.store.exact("price_by_night"))
+        with self.assertRaises(ValueError):
+            self.store.where(price_by_night=(">", 99))
+
+class TestColumnStore_no_numpy(TestColumnStore):
+    """Runs the ColumnStore unittests without numpy."""
+
+    def setUp(self):
+        self.numpy = columns.numpy
+        columns.numpy = None
+        super().setUp()
+
+    def tearDown(self):
+        columns.numpy = self.numpy
+
+
+class TestColumnStore_storage(unittest.TestCase):
+    """Unittests for testing that FileStorage keeps its columns in sync."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_columns_follow_storage(self):
+        place = Place()
+        place.price_by_night = 90
+        store = models.storage.columns(Place)
+        self.assertIs(store, models.storage.columns("Place"))
+        self.assertEqual(["Place." + place.id],
+                         store.where(price_by_night=90))
+        place.price_by_night = 95
+        self.assertEqual([], store.where(price_by_night=90))
+        other = Place()
+        self.assertEqual(2, len(store))
+        models.storage.delete(other)
+        self.assertEqual(1, len(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+"""
+import os
+import models
+import unittest
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.state import State
+from models.place import Place
+from models.city import City
+from models.review import Review
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def test_DBStorage_instantiation_no_args(self):
+        self.assertEqual(type(DBStorage()), DBStorage)
+
+    def test_DBStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+
+class TestDBStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    def setUp(self):
+        DBStorage._DBStorage__db_path = "test_file.db"
+        self.file_storage = models.storage
+        models.storage = DBStorage()
+        models.storage.reload()
+
+    def tearDown(self):
+        DBStorage._DBStorage__connection.close()
+        DBStorage._DBStorage__connection = None
+        models.storage = self.file_storage
+        os.remove("test_file.db")
+
+    def reopen(self):
+        models.storage.save()
+        models.storage.reload()
+
+    def test_tables_created(self):
+        rows = DBStorage._DBStorage__connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in rows}
+        for name in ("BaseModel", "User", "State", "City", "Amenity",
+                     "Place", "Review"):
+            self.assertIn(name, tables)
+
+    def test_foreign_keys_indexed(self):
+        rows = DBStorage._DBStorage__connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")
+        indexes = {row[0] for row in rows}
+        self.assertIn("City_state_id", indexes)
+        self.assertIn("Review_place_id", indexes)
+
+    def test_new_and_all_before_save(self):
+        us = User()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("User." + us.id, models.storage.all(User))
+
+    def test_save_and_reload(self):
+        pl = Place()
+        pl.name = "Loft"
+        pl.number_rooms = 3
+        pl.amenity_ids = ["a1", "a2"]
+        pl.extra_note = "quiet"
+        self.reopen()
+        obj = models.storage.get(Place, pl.id)
+        self.assertIsNot(pl, obj)
+        self.assertEqual("Loft", obj.name)
+        self.assertEqual(3, obj.number_rooms)
+        self.assertEqual(["a1", "a2"], obj.amenity_ids)
+        self.assertEqual("quiet", obj.extra_note)
+        self.assertEqual(pl.created_at, obj.created_at)
+        self.assertNotIn("description", obj.__dict__)
+
+    def test_identity_map(self):
+        st = State()
+        self.reopen()
+        self.assertIs(models.storage.get(State, st.id),
+                      models.storage.all(State)["State." + st.id])
+
+    def test_update_is_saved(self):
+        st = State()
+        self.reopen()
+        obj = models.storage.get("State", st.id)
+        obj.name = "Ohio"
+        self.reopen()
+        self.assertEqual("Ohio", models.storage.get("State", st.id).name)
+
+    def test_delete(self):
+        bm = BaseModel()
+        self.reopen()
+        models.storage.delete(models.storage.get(BaseModel, bm.id))
+        self.assertIsNone(models.storage.get(BaseModel, bm.id))
+        self.assertNotIn("BaseModel." + bm.id, models.storage.all())
+        self.reopen()
+        self.assertIsNone(models.storage.get(BaseModel, bm.id))
+
+    def test_count(self):
+        st = State()
+        State()
+        self.assertEqual(2, models.storage.count(State))
+        self.reopen()
+        self.assertEqual(2, models.storage.count("State"))
+        models.storage.delete(models.storage.get(State, st.id))
+        Review()
+        self.assertEqual(1, models.storage.count(State))
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual(0, models.storage.count("MyModel"))
+
+    def test_find(self):
+        rv1 = Review()
+        rv1.place_id = "p1"
+        rv2 = Review()
+        rv2.place_id = "p2"
+        self.reopen()
+        found = models.storage.find(Review, place_id="p1")
+        self.assertEqual(["Review." + rv1.id], list(found))
+
+    def test_defaults_are_stored(self):
+        pl = Place()
+        self.reopen()
+        self.assertIn("Place." + pl.id, models.storage.find(Place, city_id=""))
+        found = models.storage.query(Place, [("price_by_night", "<", 100)])
+        self.assertEqual([pl.id], [p.id for p in found])
+        self.assertNotIn("city_id", models.storage.get(Place, pl.id).__dict__)
+
+    def test_near_and_within(self):
+        sf, la = Place(), Place()
+        sf.latitude, sf.longitude = 37.7749, -122.4194
+        la.latitude, la.longitude = 34.0522, -118.2437
+        self.reopen()
+        near = models.storage.near(Place, 37.77, -122.42, 600)
+        self.assertEqual([sf.id, la.id], [p.id for p in near.values()])
+        self.assertEqual([sf.id], [p.id for p in models.storage.near(
+            "Place", 37.77, -122.42, 1).values()])
+        fiji = Place()
+        fiji.latitude, fiji.longitude = -17.7, 179.9
+        found = models.storage.within(Place, -20, 170, -10, -170)
+        self.assertEqual([fiji.id], [p.id for p in found.values()])
+        with self.assertRaises(ValueError):
+            models.storage.within(City, 0, 0, 1, 1)
+
+    def test_find_sees_unsaved_changes(self):
+        cy = City()
+        cy.state_id = "s1"
+        self.reopen()
+        models.storage.get(City, cy.id).state_id = "s2"
+        self.assertEqual({}, models.storage.find(City, state_id="s1"))
+        self.assertIn("City." + cy.id,
+                      models.storage.find(City, state_id="s2"))
+
+    def test_query_pushed_down(self):
+        places = []
+        for i in range(5):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.price_by_night = i * 50
+            places.append(pl)
+        self.reopen()
+        found = models.storage.query(Place, [("city_id", "==", "c0"),
+                                             ("price_by_night", ">", 0)],
+                                     order_by="price_by_night",
+                                     descending=True, limit=1)
+        self.assertEqual([places[4].id], [pl.id for pl in found])
+        found = models.storage.query(Place, order_by="price_by_night",
+                                     limit=2, offset=1)
+        self.assertEqual([places[1].id, places[2].id],
+                         [pl.id for pl in found])
+
+    def test_query_sees_unsaved_changes(self):
+        pl = Place()
+        pl.price_by_night = 10
+        self.reopen()
+        models.storage.get(Place, pl.id).price_by_night = 500
+        new = Place()
+        new.price_by_night = 300
+        found = models.storage.query(Place, [("price_by_night", ">", 100)],
+                                     order_by="price_by_night")
+        self.assertEqual([new.id, pl.id], [p.id for p in found])
+
+    def test_batch_defers_save(self):
+        with models.storage.batch():
+            st = State()
+            st.save()
+            rows = DBStorage._DBStorage__connection.execute(
+                "SELECT id FROM State").fetchall()
+            self.assertEqual([], rows)
+        rows = DBStorage._DBStorage__connection.execute(
+            "SELECT id FROM State").fetchall()
+        self.assertEqual([(st.id,)], rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
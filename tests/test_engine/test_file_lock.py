@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/file_lock.py.
+
+Unittest classes:
+    TestFileLock
+"""
+import multiprocessing
+import os
+import unittest
+from models.engine import file_lock
+
+
+def try_lock(exclusive, result):
+    """Reports whether the lock can be taken at once from a child"""
+    fd = os.open("test_file.lock", os.O_RDWR)
+    try:
+        flags = file_lock.fcntl.LOCK_EX if exclusive \
+            else file_lock.fcntl.LOCK_SH
+        file_lock.fcntl.flock(fd, flags | file_lock.fcntl.LOCK_NB)
+        result.value = 1
+    except BlockingIOError:
+        result.value = 0
+    finally:
+        os.close(fd)
+
+
+@unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+class TestFileLock(unittest.TestCase):
+    """Unittests for testing the inter-process file locks."""
+
+    def tearDown(self):
+        try:
+            os.remove("test_file.lock")
+        except IOError:
+            pass
+
+    def can_lock(self, exclusive):
+        context = multiprocessing.get_context("fork")
+        result = context.Value("i", -1)
+        child = context.Process(target=try_lock, args=(exclusive, result))
+        child.start()
+        child.join()
+        return result.value == 1
+
+    def test_creates_lock_file(self):
+        with file_lock.locked("test_file.lock"):
+            self.assertTrue(os.path.exists("test_file.lock"))
+
+    def test_shared_lock_admits_readers_only(self):
+        with file_lock.locked("test_file.lock"):
+            self.assertTrue(self.can_lock(exclusive=False))
+            self.assertFalse(self.can_lock(exclusive=True))
+
+    def test_exclusive_lock_admits_nobody(self):
+        with file_lock.locked("test_file.lock", exclusive=True):
+            self.assertFalse(self.can_lock(exclusive=False))
+        self.assertTrue(self.can_lock(exclusive=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,13 +4,26 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_dirty
+    TestFileStorage_find
+    TestFileStorage_lazy
+    TestFileStorage_records
+    TestFileStorage_durability
+    TestFileStorage_write_behind
+    TestFileStorage_streaming_reload
+    TestFileStorage_codecs
+    TestFileStorage_processes
 """
 import os
 import json
+import multiprocessing
 import models
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
+from models.engine import codec, file_lock, record_file
 from models.engine.file_storage import FileStorage
 from models.user import User
 from models.state import State
@@ -56,6 +69,10 @@ class TestFileStorage_methods(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -65,9 +82,34 @@ class TestFileStorage_methods(unittest.TestCase):
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
-        with self.assertRaises(TypeError):
-            models.storage.all(None)
+    def test_all_with_none(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
+
+    def test_all_with_class(self):
+        st = State()
+        rv = Review()
+        states = models.storage.all(State)
+        self.assertIn("State." + st.id, states)
+        self.assertNotIn("Review." + rv.id, states)
+        self.assertEqual(states, models.storage.all("State"))
+        self.assertEqual({}, models.storage.all("MyModel"))
+
+    def test_all_with_class_after_delete(self):
+        st = State()
+        models.storage.delete(st)
+        self.assertNotIn("State." + st.id, models.storage.all(State))
+
+    def test_all_with_class_after_objects_replaced(self):
+        st = State()
+        FileStorage._FileStorage__objects = {}
+        self.assertNotIn("State." + st.id, models.storage.all(State))
+
+    def test_all_with_class_after_reload(self):
+        cy = City()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("City." + cy.id, models.storage.all(City))
 
     def test_new(self):
         bm = BaseModel()
@@ -165,6 +207,875 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+        FileStorage._FileStorage__file_path = "test_journal.json"
+        FileStorage._FileStorage__journal = True
+
+    def tearDown(self):
+        models.storage.reload()
+        for path in ("test_journal.json", "test_journal.json.lock",
+                     "test_journal.json.journal",
+                     "test_journal.json.journal.compacting"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = "file.json"
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__compact_every = 1000
+
+    def test_save_appends_only_changes(self):
+        bm = BaseModel()
+        models.storage.save()
+        us = User()
+        models.storage.save()
+        with open("test_journal.json.journal") as f:
+            lines = f.readlines()
+        self.assertEqual(2, len(lines))
+        self.assertIn("User." + us.id, lines[1])
+        self.assertNotIn("BaseModel." + bm.id, lines[1])
+        self.assertFalse(os.path.exists("test_journal.json"))
+
+    def test_reload_replays_journal(self):
+        bm = BaseModel()
+        pl = Place()
+        models.storage.save()
+        pl.name = "Loft"
+        pl.save()
+        models.storage.delete(bm)
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertNotIn("BaseModel." + bm.id, objs)
+        self.assertEqual("Loft", objs["Place." + pl.id].name)
+
+    def test_compaction_writes_snapshot(self):
+        FileStorage._FileStorage__compact_every = 3
+        st = State()
+        cy = City()
+        am = Amenity()
+        models.storage.save()
+        models.storage.reload()
+        self.assertFalse(os.path.exists("test_journal.json.journal"))
+        with open("test_journal.json") as f:
+            objdict = json.load(f)
+        self.assertIn("State." + st.id, objdict)
+        self.assertIn("City." + cy.id, objdict)
+        self.assertIn("Amenity." + am.id, objdict)
+
+
+class TestFileStorage_dirty(unittest.TestCase):
+    """Unittests for testing dirty tracking in the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_new_marks_dirty(self):
+        bm = BaseModel()
+        self.assertTrue(bm._dirty)
+        self.assertIn("BaseModel." + bm.id, FileStorage._FileStorage__dirty)
+
+    def test_save_clears_dirty(self):
+        bm = BaseModel()
+        models.storage.save()
+        self.assertFalse(bm._dirty)
+        self.assertEqual({}, FileStorage._FileStorage__dirty)
+
+    def test_setattr_marks_dirty(self):
+        pl = Place()
+        models.storage.save()
+        pl.name = "Loft"
+        self.assertTrue(pl._dirty)
+        self.assertIn("Place." + pl.id, FileStorage._FileStorage__dirty)
+
+    def test_clean_objects_reuse_cache(self):
+        FileStorage._FileStorage__cache_records = True
+        try:
+            us = User()
+            models.storage.save()
+            cache = us._cache
+            models.storage.save()
+            self.assertIs(cache, us._cache)
+            us.email = "a@b.c"
+            models.storage.save()
+            self.assertEqual("a@b.c", us._cache["email"])
+        finally:
+            FileStorage._FileStorage__cache_records = False
+
+    def test_save_keeps_no_cache(self):
+        us = User()
+        models.storage.save()
+        self.assertIsNone(us._cache)
+        self.assertFalse(us._dirty)
+
+    def test_reload_objects_are_clean(self):
+        rv = Review()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        obj = models.storage.all()["Review." + rv.id]
+        self.assertFalse(obj._dirty)
+        self.assertIsNone(obj._cache)
+
+    def test_reload_keeps_records_if_cached(self):
+        rv = Review()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__cache_records = True
+        try:
+            models.storage.reload()
+        finally:
+            FileStorage._FileStorage__cache_records = False
+        obj = models.storage.all()["Review." + rv.id]
+        self.assertFalse(obj._dirty)
+        self.assertEqual("Review", obj._cache["__class__"])
+
+    def test_internal_flags_not_serialized(self):
+        bm = BaseModel()
+        self.assertNotIn("_dirty", bm.to_dict())
+        self.assertNotIn("_cache", str(bm))
+
+
+class TestFileStorage_find(unittest.TestCase):
+    """Unittests for testing attribute indexes of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_find_by_foreign_key(self):
+        rv1 = Review(place_id="p1")
+        rv2 = Review(place_id="p2")
+        models.storage.new(rv1)
+        models.storage.new(rv2)
+        found = models.storage.find(Review, place_id="p1")
+        self.assertEqual({"Review." + rv1.id: rv1}, found)
+
+    def test_find_follows_updates(self):
+        cy = City()
+        cy.state_id = "s1"
+        self.assertIn("City." + cy.id,
+                      models.storage.find(City, state_id="s1"))
+        cy.state_id = "s2"
+        self.assertEqual({}, models.storage.find(City, state_id="s1"))
+        self.assertIn("City." + cy.id,
+                      models.storage.find(City, state_id="s2"))
+
+    def test_find_after_delete(self):
+        pl = Place()
+        pl.city_id = "c1"
+        models.storage.delete(pl)
+        self.assertEqual({}, models.storage.find(Place, city_id="c1"))
+
+    def test_find_several_attributes(self):
+        pl1 = Place()
+        pl1.city_id = "c1"
+        pl1.user_id = "u1"
+        pl2 = Place()
+        pl2.city_id = "c1"
+        pl2.user_id = "u2"
+        found = models.storage.find(Place, city_id="c1", user_id="u2")
+        self.assertEqual({"Place." + pl2.id: pl2}, found)
+
+    def test_find_unindexed_attribute(self):
+        st = State()
+        st.name = "Texas"
+        self.assertIn("State." + st.id,
+                      models.storage.find(State, name="Texas"))
+
+    def test_find_after_reload(self):
+        rv = Review()
+        rv.place_id = "p1"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find("Review", place_id="p1")
+        self.assertIn("Review." + rv.id, found)
+
+    def make_places(self):
+        places = []
+        for i in range(6):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.price_by_night = i * 50
+            places.append(pl)
+        return places
+
+    def test_query_conditions(self):
+        places = self.make_places()
+        found = models.storage.query(Place, [("city_id", "==", "c0"),
+                                             ("price_by_night", "<", 200)])
+        self.assertEqual([places[0], places[2]], list(found))
+
+    def test_query_column_range(self):
+        places = self.make_places()
+        found = models.storage.query(Place, [("price_by_night", ">=", 100),
+                                             ("price_by_night", "!=", 150)],
+                                     order_by="price_by_night")
+        self.assertEqual([places[2], places[4], places[5]], list(found))
+        places[0].price_by_night = 120
+        found = models.storage.query("Place",
+                                     [("price_by_night", ">", 110)],
+                                     order_by="price_by_night", limit=2)
+        self.assertEqual([places[0], places[3]], list(found))
+
+    def test_query_inexact_column(self):
+        places = self.make_places()
+        models.storage.columns(Place)
+        places[1].price_by_night = 99.5
+        places[2].price_by_night = 2 ** 70 + 1
+        found = models.storage.query(Place, [("price_by_night", ">", 99),
+                                             ("price_by_night", "<", 101)])
+        self.assertEqual([places[1]], list(found))
+        found = models.storage.query(Place, [("price_by_night", ">", 10 ** 6)])
+        self.assertEqual([places[2]], list(found))
+
+    def test_query_order_limit_offset(self):
+        places = self.make_places()
+        found = models.storage.query(Place, order_by="price_by_night",
+                                     descending=True, limit=2, offset=1)
+        self.assertEqual([places[4], places[3]], list(found))
+
+    def test_query_errors(self):
+        self.assertEqual([], list(models.storage.query("MyModel")))
+        with self.assertRaises(ValueError):
+            models.storage.query(Place, [("city_id", "~", "c1")])
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy reload mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.st = State()
+        self.pl = Place()
+        self.pl.city_id = "c1"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__objects = {}
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_reload_builds_nothing(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+
+    def test_get_builds_one_object(self):
+        obj = models.storage.get("State", self.st.id)
+        self.assertIsInstance(obj, State)
+        self.assertEqual(self.st.id, obj.id)
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+        self.assertIsNone(models.storage.get("State", "missing"))
+
+    def test_all_with_class_builds_that_class(self):
+        self.assertIn("Place." + self.pl.id, models.storage.all(Place))
+        self.assertNotIn("State." + self.st.id,
+                         FileStorage._FileStorage__objects)
+
+    def test_all_builds_everything(self):
+        objs = models.storage.all()
+        self.assertIn("Place." + self.pl.id, objs)
+        self.assertIn("State." + self.st.id, objs)
+
+    def test_find_builds_class(self):
+        found = models.storage.find(Place, city_id="c1")
+        self.assertIn("Place." + self.pl.id, found)
+
+    def test_count_builds_nothing(self):
+        self.assertEqual(1, models.storage.count(Place))
+        self.assertEqual(2, models.storage.count())
+        State()
+        self.assertEqual(2, models.storage.count("State"))
+        by_class = FileStorage._FileStorage__by_class
+        self.assertEqual({}, by_class.get("Place", {}))
+
+    def test_save_keeps_unloaded_records(self):
+        us = User()
+        models.storage.save()
+        with open("file.json") as f:
+            objdict = json.load(f)
+        self.assertIn("User." + us.id, objdict)
+        self.assertIn("Place." + self.pl.id, objdict)
+        self.assertIn("State." + self.st.id, objdict)
+
+
+class TestFileStorage_records(unittest.TestCase):
+    """Unittests for testing the record file format of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__format = "records"
+        self.st = State()
+        self.st.name = "Ohio"
+        self.pl = Place()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__objects = {}
+        models.storage.all()
+        for path in ("file.json", "file.json.lock",
+                     "test_export.json"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_save_writes_record_file(self):
+        with open("file.json", "rb") as f:
+            self.assertEqual(record_file.MAGIC, f.read(8))
+
+    def test_reload(self):
+        models.storage.reload()
+        self.assertEqual("Ohio",
+                         models.storage.all()["State." + self.st.id].name)
+
+    def test_lazy_reload_reads_one_record(self):
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        obj = models.storage.get(State, self.st.id)
+        self.assertEqual("Ohio", obj.name)
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+        self.assertIn("Place." + self.pl.id, models.storage.all(Place))
+
+    def test_lazy_save_keeps_unloaded_records(self):
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        models.storage.delete(models.storage.get(Place, self.pl.id))
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertIn("State." + self.st.id, objs)
+        self.assertIn("User." + us.id, objs)
+        self.assertNotIn("Place." + self.pl.id, objs)
+
+    def test_lazy_count(self):
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        self.assertEqual(1, models.storage.count(State))
+        self.assertEqual(0, len(FileStorage._FileStorage__objects))
+        st = models.storage.get(State, self.st.id)
+        self.assertEqual(1, models.storage.count(State))
+        models.storage.delete(st)
+        self.assertEqual(0, models.storage.count(State))
+        models.storage.delete(models.storage.get(Place, self.pl.id))
+        User()
+        self.assertEqual(1, models.storage.count())
+        models.storage.save()
+        self.assertEqual(1, models.storage.count())
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_export_import_json(self):
+        models.storage.reload()
+        models.storage.export_json("test_export.json")
+        with open("test_export.json") as f:
+            self.assertIn("State." + self.st.id, json.load(f))
+        FileStorage._FileStorage__objects = {}
+        models.storage.import_json("test_export.json")
+        self.assertIn("Place." + self.pl.id, models.storage.all())
+
+
+class TestFileStorage_durability(unittest.TestCase):
+    """Unittests for testing atomic, checksummed saves of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        FileStorage._FileStorage__checksum = False
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.lock", "file.json.tmp"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_save_leaves_no_temporary_file(self):
+        BaseModel()
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.json"))
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+    def test_failed_save_keeps_old_file(self):
+        bm = BaseModel()
+        models.storage.save()
+        bm.bad = object()
+        with self.assertRaises(TypeError):
+            models.storage.save()
+        with open("file.json") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+    def test_streamed_file_matches_json_dump(self):
+        objs = [BaseModel(), Place(), Review()]
+        objs[1].amenity_ids = ["a", "b"]
+        models.storage.save()
+        expected = json.dumps({"{}.{}".format(type(o).__name__, o.id):
+                               o.to_dict() for o in objs})
+        with open("file.json") as f:
+            self.assertEqual(expected, f.read())
+
+    def test_empty_store_saves_empty_dictionary(self):
+        models.storage.save()
+        with open("file.json") as f:
+            self.assertEqual({}, json.load(f))
+
+    def test_checksum_footer_round_trip(self):
+        FileStorage._FileStorage__checksum = True
+        st = State()
+        models.storage.save()
+        with open("file.json") as f:
+            self.assertIn("\n#crc32=", f.read())
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("State." + st.id, models.storage.all())
+
+    def test_checksum_mismatch_raises(self):
+        FileStorage._FileStorage__checksum = True
+        State()
+        models.storage.save()
+        with open("file.json", "r+b") as f:
+            f.seek(2)
+            f.write(b"X")
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing deferred saves of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+
+    def tearDown(self):
+        if FileStorage._FileStorage__timer is not None:
+            FileStorage._FileStorage__timer.cancel()
+            FileStorage._FileStorage__timer = None
+        FileStorage._FileStorage__flush_every = 0
+        FileStorage._FileStorage__flush_interval = 0
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_batch_defers_save(self):
+        with models.storage.batch():
+            bm = BaseModel()
+            bm.save()
+            self.assertFalse(os.path.exists("file.json"))
+        with open("file.json") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_nested_batch_writes_once(self):
+        with models.storage.batch():
+            with models.storage.batch():
+                User().save()
+            self.assertFalse(os.path.exists("file.json"))
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_batch_flushes_on_error(self):
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                st = State()
+                raise KeyError
+        with open("file.json") as f:
+            self.assertIn("State." + st.id, json.load(f))
+
+    def test_dirty_count_threshold(self):
+        FileStorage._FileStorage__flush_every = 3
+        City().save()
+        City().save()
+        self.assertFalse(os.path.exists("file.json"))
+        City().save()
+        with open("file.json") as f:
+            self.assertEqual(3, len(json.load(f)))
+
+    def test_flush_interval(self):
+        FileStorage._FileStorage__flush_interval = 3600
+        models.storage.flush()
+        Amenity().save()
+        with open("file.json") as f:
+            self.assertEqual({}, json.load(f))
+        FileStorage._FileStorage__last_flush -= 3600
+        Amenity().save()
+        with open("file.json") as f:
+            self.assertEqual(2, len(json.load(f)))
+
+    def test_flush_interval_timer(self):
+        FileStorage._FileStorage__flush_interval = 0.1
+        models.storage.flush()
+        Amenity().save()
+        with open("file.json") as f:
+            self.assertEqual({}, json.load(f))
+        FileStorage._FileStorage__timer.join(5)
+        with open("file.json") as f:
+            self.assertEqual(1, len(json.load(f)))
+        self.assertEqual({}, FileStorage._FileStorage__dirty)
+        self.assertIsNone(FileStorage._FileStorage__timer)
+
+    def test_exit_hook_registered(self):
+        FileStorage._FileStorage__flush_every = 10
+        Review().save()
+        self.assertTrue(FileStorage._FileStorage__exit_hook)
+
+
+class TestFileStorage_streaming_reload(unittest.TestCase):
+    """Unittests for testing the incremental reload of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.objs = [State(), City(), Place(), Review(), User()]
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        FileStorage._FileStorage__progress_every = 10000
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.lock", "file.json.journal"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_progress_callback(self):
+        FileStorage._FileStorage__progress_every = 2
+        calls = []
+        models.storage.reload(progress=calls.append)
+        self.assertEqual([2, 4, 5], calls)
+        self.assertEqual(5, len(FileStorage._FileStorage__objects))
+
+    def test_reload_without_wait_loads_on_demand(self):
+        models.storage.reload(wait=False)
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        pl = models.storage.get(Place, self.objs[2].id)
+        self.assertEqual(self.objs[2].id, pl.id)
+        self.assertEqual(3, len(FileStorage._FileStorage__objects))
+        self.assertEqual(5, len(models.storage.all()))
+
+    def test_reload_without_wait_missing_key_reads_everything(self):
+        models.storage.reload(wait=False)
+        self.assertIsNone(models.storage.get(Place, "missing"))
+        self.assertEqual(5, len(FileStorage._FileStorage__objects))
+
+    def test_new_finishes_pending_reload(self):
+        models.storage.reload(wait=False)
+        am = Amenity()
+        self.assertEqual(6, len(FileStorage._FileStorage__objects))
+        self.assertIs(am, models.storage.get(Amenity, am.id))
+
+    def test_journal_records_are_final(self):
+        FileStorage._FileStorage__journal = True
+        models.storage.reload()
+        st = models.storage.get(State, self.objs[0].id)
+        st.name = "Ohio"
+        st.save()
+        models.storage.delete(models.storage.get(User, self.objs[4].id))
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(wait=False)
+        self.assertEqual("Ohio", models.storage.get(State, st.id).name)
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+        self.assertIsNone(models.storage.get(User, self.objs[4].id))
+        self.assertEqual(4, len(models.storage.all()))
+
+
+class TestFileStorage_codecs(unittest.TestCase):
+    """Unittests for testing the snapshot codecs of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.pl = Place()
+        self.pl.number_rooms = 4
+        self.pl.amenity_ids = ["a"]
+        self.rv = Review()
+        self.rv.text = "Great"
+
+    def tearDown(self):
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__checksum = False
+        FileStorage._FileStorage__objects = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.remove("file.json.lock")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def check_reload(self):
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        pl = models.storage.get(Place, self.pl.id)
+        self.assertEqual(4, pl.number_rooms)
+        self.assertEqual(["a"], pl.amenity_ids)
+        self.assertEqual(self.pl.created_at, pl.created_at)
+        self.assertEqual("Great", models.storage.get(Review, self.rv.id).text)
+
+    def test_codecs_detected_on_reload(self):
+        for name in codec.CODECS:
+            with self.subTest(codec=name):
+                FileStorage._FileStorage__format = name
+                models.storage.save()
+                with open("file.json", "rb") as f:
+                    self.assertEqual(codec.HEADER + name.encode(),
+                                     f.readline().strip())
+                self.check_reload()
+                self.pl, self.rv = models.storage.get(Place, self.pl.id), \
+                    models.storage.get(Review, self.rv.id)
+
+    def test_codec_with_checksum(self):
+        FileStorage._FileStorage__format = "pickle"
+        FileStorage._FileStorage__checksum = True
+        models.storage.save()
+        self.check_reload()
+        with open("file.json", "r+b") as f:
+            f.seek(12)
+            f.write(b"X")
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+
+    def test_unknown_format_keeps_old_file(self):
+        models.storage.save()
+        FileStorage._FileStorage__format = "xml"
+        with self.assertRaises(ValueError):
+            models.storage.save()
+        self.check_reload()
+
+
+def write_places(count):
+    """Saves count Places one at a time from a child process"""
+    FileStorage._FileStorage__objects = {}
+    models.storage.reload()
+    for i in range(count):
+        Place().save()
+
+
+class TestFileStorage_processes(unittest.TestCase):
+    """Unittests for testing FileStorage shared by several processes."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.st = State()
+        self.st.name = "Ohio"
+        self.pl = Place()
+        models.storage.save()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.lock", "file.json.journal"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def rewrite(self, change):
+        """Rewrites file.json as another process would, through change"""
+        with open("file.json") as f:
+            objdict = json.load(f)
+        change(objdict)
+        with open("file.json.tmp", "w") as f:
+            json.dump(objdict, f)
+        os.replace("file.json.tmp", "file.json")
+
+    def test_save_merges_other_writes(self):
+        other = City()
+        other_key = "City." + other.id
+        record = other.to_dict()
+        models.storage.delete(other)
+        FileStorage._FileStorage__dirty.clear()
+
+        def change(objdict):
+            objdict[other_key] = record
+            objdict["State." + self.st.id]["name"] = "Iowa"
+            del objdict["Place." + self.pl.id]
+        self.rewrite(change)
+        User().save()
+        objs = models.storage.all()
+        self.assertIn(other_key, objs)
+        self.assertEqual("Iowa", objs["State." + self.st.id].name)
+        self.assertNotIn("Place." + self.pl.id, objs)
+        with open("file.json") as f:
+            self.assertEqual(set(objs), set(json.load(f)))
+
+    def test_unsaved_changes_win(self):
+        def change(objdict):
+            objdict["State." + self.st.id]["name"] = "Iowa"
+            del objdict["Place." + self.pl.id]
+        self.rewrite(change)
+        self.st.name = "Utah"
+        self.st.save()
+        with open("file.json") as f:
+            objdict = json.load(f)
+        self.assertEqual("Utah", objdict["State." + self.st.id]["name"])
+        self.assertNotIn("Place." + self.pl.id, objdict)
+
+    def test_own_writes_are_not_merged(self):
+        self.pl.name = "Loft"
+        with patch.object(FileStorage,
+                          "_FileStorage__merge_snapshot") as merge:
+            models.storage.save()
+        merge.assert_not_called()
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_concurrent_writers_lose_nothing(self):
+        context = multiprocessing.get_context("fork")
+        writers = [context.Process(target=write_places, args=(15,))
+                   for i in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+            self.assertEqual(0, writer.exitcode)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(61, models.storage.count(Place))
+        self.assertEqual(1, models.storage.count(State))
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_concurrent_journal_writers(self):
+        FileStorage._FileStorage__journal = True
+        try:
+            context = multiprocessing.get_context("fork")
+            writers = [context.Process(target=write_places, args=(10,))
+                       for i in range(3)]
+            for writer in writers:
+                writer.start()
+            for writer in writers:
+                writer.join()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+            self.assertEqual(31, models.storage.count(Place))
+        finally:
+            FileStorage._FileStorage__journal = False
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/geo_index.py.
+
+Unittest classes:
+    TestGeoIndex
+    TestGeoIndex_storage
+"""
+import unittest
+import models
+from models.engine.file_storage import FileStorage
+from models.engine.geo_index import GeoIndex, distance_km
+from models.place import Place
+from models.state import State
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Unittests for testing the GeoIndex class."""
+
+    def setUp(self):
+        self.geo = GeoIndex()
+        self.geo.add("sf", 37.7749, -122.4194)
+        self.geo.add("oakland", 37.8044, -122.2712)
+        self.geo.add("la", 34.0522, -118.2437)
+        self.geo.add("fiji", -17.7134, 178.0650)
+        self.geo.add("samoa", -13.7590, -172.1046)
+
+    def test_distance_km(self):
+        self.assertAlmostEqual(559, distance_km(37.7749, -122.4194,
+                                                34.0522, -118.2437), delta=2)
+
+    def test_near(self):
+        found = self.geo.near(37.7749, -122.4194, 20)
+        self.assertEqual(["sf", "oakland"], [key for d, key in found])
+        self.assertAlmostEqual(0, found[0][0])
+
+    def test_near_large_radius(self):
+        found = [key for d, key in self.geo.near(37.7749, -122.4194, 600)]
+        self.assertEqual(["sf", "oakland", "la"], found)
+
+    def test_near_antimeridian(self):
+        found = [key for d, key in self.geo.near(-16.0, 179.9, 1000)]
+        self.assertEqual(["fiji", "samoa"], found)
+
+    def test_within(self):
+        found = self.geo.within(37.0, -123.0, 38.0, -122.0)
+        self.assertEqual({"sf", "oakland"}, set(found))
+        self.assertEqual({"fiji", "samoa"},
+                         set(self.geo.within(-20, 170, -10, -170)))
+
+    def test_move_and_remove(self):
+        self.geo.add("sf", 34.06, -118.25)
+        self.assertEqual({"sf", "la"},
+                         {k for d, k in self.geo.near(34.0522, -118.2437, 5)})
+        self.geo.remove("sf")
+        self.assertEqual(4, len(self.geo))
+        self.assertEqual([], self.geo.within(37.0, -123.0, 37.78, -122.3))
+
+    def test_invalid_coordinates_skipped(self):
+        self.geo.add("nowhere", "north", None)
+        self.geo.add("nan", float("nan"), 0)
+        self.geo.add("inf", 0, float("inf"))
+        self.geo.add("huge", 10 ** 400, 0)
+        self.assertEqual(5, len(self.geo))
+        self.geo.add("sf", float("nan"), 0)
+        self.assertEqual(4, len(self.geo))
+
+
+class TestGeoIndex_storage(unittest.TestCase):
+    """Unittests for testing the spatial queries of FileStorage."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_near_follows_storage(self):
+        place = Place()
+        place.latitude = 37.7749
+        place.longitude = -122.4194
+        self.assertIn("Place." + place.id,
+                      models.storage.near(Place, 37.77, -122.42, 1))
+        place.latitude = 34.0522
+        place.longitude = -118.2437
+        self.assertEqual({}, models.storage.near(Place, 37.77, -122.42, 1))
+        other = Place()
+        other.latitude, other.longitude = 34.06, -118.25
+        found = models.storage.within("Place", 34, -119, 35, -118)
+        self.assertEqual({place, other}, set(found.values()))
+        models.storage.delete(other)
+        self.assertEqual([place], list(
+            models.storage.within(Place, 34, -119, 35, -118).values()))
+
+    def test_non_finite_coordinates(self):
+        place = Place()
+        place.latitude, place.longitude = 1.0, 1.0
+        self.assertIn("Place." + place.id, models.storage.near(Place, 1, 1, 1))
+        place.latitude = float("nan")
+        self.assertEqual({}, models.storage.near(Place, 1, 1, 1))
+        place.latitude = float("inf")
+        self.assertEqual({}, models.storage.within(Place, -90, -1, 90, 2))
+
+    def test_class_without_coordinates(self):
+        with self.assertRaises(ValueError):
+            models.storage.near(State, 0, 0, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/json_stream.py.
+
+Unittest classes:
+    TestJsonStream
+"""
+import io
+import json
+import unittest
+from models.engine import json_stream
+
+
+class TestJsonStream(unittest.TestCase):
+    """Unittests for testing the incremental JSON dictionary reader."""
+
+    def setUp(self):
+        self.objdict = {
+            "State.1": {"__class__": "State", "id": "1", "name": "{Ohio}"},
+            "Place.2": {"__class__": "Place", "id": "2",
+                        "number_rooms": 123456, "latitude": -1.5e-3,
+                        "amenity_ids": ["a", "b"], "note": "é\"}\\"},
+            "City.3": {},
+        }
+
+    def items(self, text, chunk_size):
+        return list(json_stream.iter_items(io.StringIO(text), chunk_size))
+
+    def test_reads_every_chunk_size(self):
+        text = json.dumps(self.objdict)
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            self.assertEqual(list(self.objdict.items()),
+                             self.items(text, chunk_size))
+
+    def test_whitespace(self):
+        text = json.dumps(self.objdict, indent=4)
+        self.assertEqual(list(self.objdict.items()), self.items(text, 5))
+
+    def test_number_split_across_chunks(self):
+        self.assertEqual([("a", 12345), ("b", 6.5)],
+                         self.items('{"a": 12345, "b": 6.5}', 2))
+
+    def test_empty_dictionary(self):
+        self.assertEqual([], self.items(" { } ", 1))
+
+    def test_stops_at_closing_brace(self):
+        self.assertEqual([("a", 1)], self.items('{"a": 1}\n#crc32=0\n', 3))
+
+    def test_is_incremental(self):
+        f = io.StringIO(json.dumps(self.objdict))
+        items = json_stream.iter_items(f, 16)
+        self.assertEqual("State.1", next(items)[0])
+        self.assertLess(f.tell(), len(f.getvalue()))
+
+    def test_truncated_raises(self):
+        text = json.dumps(self.objdict)
+        for end in (0, 1, 10, len(text) // 2, len(text) - 1):
+            with self.assertRaises(ValueError):
+                self.items(text[:end], 4)
+
+    def test_not_a_dictionary_raises(self):
+        for text in ('[1, 2]', '{1: 2}', '{"a" 1}', '{"a": 1 "b": 2}'):
+            with self.assertRaises(ValueError):
+                self.items(text, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/query.py.
+
+Unittest classes:
+    TestQuery
+"""
+import unittest
+from models.engine import query
+
+
+class Row:
+    """Object with the attributes given as keyword arguments."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestQuery(unittest.TestCase):
+    """Unittests for testing the shared query helpers."""
+
+    def setUp(self):
+        self.rows = [Row(n=3, s="b"), Row(n=1, s="a"), Row(n="x"),
+                     Row(n=2, s="c"), Row(n=None, s="a")]
+
+    def test_matches(self):
+        self.assertTrue(query.matches(self.rows[0], [("n", ">", 2),
+                                                     ("s", "==", "b")]))
+        self.assertFalse(query.matches(self.rows[2], [("n", ">", 2)]))
+        self.assertFalse(query.matches(self.rows[2], [("s", "==", "b")]))
+        self.assertTrue(query.matches(self.rows[2], [("s", "==", None)]))
+
+    def test_check(self):
+        query.check([("n", "<=", 1)])
+        with self.assertRaises(ValueError):
+            query.check([("n", "=~", 1)])
+
+    def test_select_streams_in_order(self):
+        found = query.select(self.rows, [("s", "!=", "c")])
+        self.assertIs(self.rows[0], next(found))
+        self.assertIs(self.rows[1], next(found))
+
+    def test_select_order_by(self):
+        self.assertEqual([1, 2, 3, "x", None], [r.n for r in query.select(
+            self.rows, order_by="n")])
+        self.assertEqual([3, 2], [r.n for r in query.select(
+            self.rows, [("n", "<", 10)], order_by="n", descending=True,
+            limit=2)])
+
+    def test_select_limit_offset(self):
+        self.assertEqual([self.rows[1], self.rows[2]], list(query.select(
+            self.rows, limit=2, offset=1)))
+        self.assertEqual([2, 3], [r.n for r in query.select(
+            self.rows, order_by="n", limit=2, offset=1)])
+        self.assertEqual([], list(query.select(self.rows, limit=0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
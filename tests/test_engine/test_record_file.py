@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/record_file.py.
+
+Unittest classes:
+    TestRecordFile
+"""
+import os
+import unittest
+from models.engine import record_file
+
+
+class TestRecordFile(unittest.TestCase):
+    """Unittests for testing the record file format."""
+
+    def setUp(self):
+        self.items = [
+            ("State.2", {"__class__": "State", "id": "2", "name": "Texas"}),
+            ("City.1", {"__class__": "City", "id": "1", "state_id": "2"}),
+            ("State.1", {"__class__": "State", "id": "1", "name": "Ohio"}),
+        ]
+        record_file.write("test_records.rec", iter(self.items))
+        self.records = record_file.RecordFile("test_records.rec")
+
+    def tearDown(self):
+        self.records.close()
+        os.remove("test_records.rec")
+
+    def test_is_record_file(self):
+        self.assertTrue(record_file.is_record_file("test_records.rec"))
+        self.assertFalse(record_file.is_record_file("missing.rec"))
+
+    def test_len(self):
+        self.assertEqual(3, len(self.records))
+
+    def test_get(self):
+        self.assertEqual(self.items[0][1], self.records.get("State.2"))
+        self.assertEqual(self.items[1][1], self.records.get("City.1"))
+        self.assertIsNone(self.records.get("State.3"))
+        self.assertIsNone(self.records.get("State"))
+
+    def test_items_with_prefix(self):
+        keys = [k for k, v in self.records.items("State.")]
+        self.assertEqual(["State.1", "State.2"], keys)
+        self.assertEqual([], list(self.records.items("Place.")))
+
+    def test_items_all(self):
+        self.assertEqual(dict(self.items), dict(self.records.items()))
+
+    def test_contains_and_count(self):
+        self.assertIn("City.1", self.records)
+        self.assertNotIn("City.2", self.records)
+        self.assertEqual(2, self.records.count("State."))
+        self.assertEqual(0, self.records.count("Place."))
+        self.assertEqual(3, self.records.count())
+
+    def test_key_too_long(self):
+        with self.assertRaises(ValueError):
+            record_file.write("test_long.rec", [("x" * 65, {})])
+        os.remove("test_long.rec")
+
+    def test_not_a_record_file(self):
+        with open("test_not.rec", "w") as f:
+            f.write("{}" * 20)
+        with self.assertRaises(ValueError):
+            record_file.RecordFile("test_not.rec")
+        os.remove("test_not.rec")
+
+
+if __name__ == "__main__":
+    unittest.main()
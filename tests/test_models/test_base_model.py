@@ -2,10 +2,13 @@
 """Unit tests for the BaseModel class in the models module."""
 
 import os
+import timeit
 import unittest
+import models
 from datetime import datetime
 from time import sleep
-from models.base_model import BaseModel
+from unittest.mock import patch
+from models.base_model import BaseModel, _parse_datetime
 
 class TestBaseModelInstantiation(unittest.TestCase):
     """Test cases for BaseModel class instantiation."""
@@ -66,6 +69,132 @@ class TestBaseModelInstantiation(unittest.TestCase):
         with self.assertRaises(TypeError):
             BaseModel(id=None, created_at=None, updated_at=None)
 
+    def test_instantiation_without_microseconds(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54)
+        base_model = BaseModel(created_at=dt.isoformat())
+        self.assertEqual(base_model.created_at, dt)
+
+    def test_kwargs_not_reindexed(self):
+        from models.place import Place
+        with patch.object(models.storage, "reindex") as reindex:
+            place = Place(city_id="c1", price_by_night=10)
+        reindex.assert_not_called()
+        self.assertEqual("c1", place.city_id)
+        self.assertEqual(10, place.price_by_night)
+
+
+class TestBaseModelParseDatetime(unittest.TestCase):
+    """Test cases for the datetime parser used by BaseModel."""
+
+    def test_parse_legacy_format(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54, 52298)
+        self.assertEqual(dt, _parse_datetime("2017-09-28T21:03:54.052298"))
+
+    def test_parse_invalid(self):
+        with self.assertRaises(ValueError):
+            _parse_datetime("28/09/2017")
+
+    def test_parse_faster_than_strptime(self):
+        value = datetime.today().isoformat()
+        number = 2000
+        before = timeit.timeit(
+            lambda: datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f"),
+            number=number) / number
+        after = timeit.timeit(lambda: _parse_datetime(value),
+                              number=number) / number
+        self.assertLess(after, before)
+
+
+class TestBaseModelCompact(unittest.TestCase):
+    """Test cases for the compact (slotted) variant of the models."""
+
+    def setUp(self):
+        BaseModel._compact_mode = True
+
+    def tearDown(self):
+        BaseModel._compact_mode = False
+
+    def test_compact_instance(self):
+        from models.place import Place
+        place = Place()
+        self.assertIsInstance(place, Place)
+        self.assertIsNot(type(place), Place)
+        self.assertEqual("Place", type(place).__name__)
+        self.assertIs(type(place), Place.compact())
+
+    def test_fields_in_slots(self):
+        from models.place import Place
+        place = Place(name="Loft", number_rooms=2)
+        self.assertEqual("Loft", place.name)
+        self.assertEqual({}, place.__dict__)
+        self.assertIsNone(place._extra)
+
+    def test_kwargs_not_reindexed(self):
+        from models.place import Place
+        with patch.object(models.storage, "reindex") as reindex:
+            place = Place(city_id="c1", nickname="loft")
+        reindex.assert_not_called()
+        self.assertEqual("c1", place.city_id)
+        self.assertEqual({"nickname": "loft"}, place._extra)
+
+    def test_unset_field_reads_default(self):
+        from models.place import Place
+        place = Place()
+        self.assertEqual("", place.name)
+        self.assertEqual(0, place.number_rooms)
+        self.assertNotIn("name", place.to_dict())
+
+    def test_list_default_not_shared(self):
+        from models.place import Place
+        place = Place()
+        place.amenity_ids.append("a1")
+        self.assertEqual([], Place.amenity_ids)
+        self.assertEqual([], Place().amenity_ids)
+
+    def test_overflow_attributes(self):
+        base_model = BaseModel()
+        base_model.nickname = "bm"
+        self.assertEqual("bm", base_model.nickname)
+        self.assertEqual({"nickname": "bm"}, base_model._extra)
+        self.assertEqual("bm", base_model.to_dict()["nickname"])
+        self.assertIn("'nickname': 'bm'", str(base_model))
+        with self.assertRaises(AttributeError):
+            base_model.missing
+
+    def test_round_trip(self):
+        from models.review import Review
+        review = Review(place_id="p1", text="Nice")
+        review.extra_note = "x"
+        copy = Review(**review.to_dict())
+        self.assertEqual(review.to_dict(), copy.to_dict())
+
+
+class TestBaseModelRegistry(unittest.TestCase):
+    """Test cases for the registry of model classes."""
+
+    def test_models_registered(self):
+        import models
+        from models.place import Place
+        from models.review import Review
+        self.assertIs(BaseModel, BaseModel._registry["BaseModel"])
+        self.assertIs(Place, BaseModel._registry["Place"])
+        self.assertIs(Review, BaseModel._registry["Review"])
+        self.assertIs(BaseModel._registry, models.storage.classes)
+
+    def test_subclass_registered_on_definition(self):
+        class Castle(BaseModel):
+            towers = 4
+        try:
+            self.assertIs(Castle, BaseModel._registry["Castle"])
+        finally:
+            del BaseModel._registry["Castle"]
+
+    def test_compact_variant_not_registered(self):
+        from models.city import City
+        City.compact()
+        self.assertIs(City, BaseModel._registry["City"])
+
+
 class TestBaseModelSave(unittest.TestCase):
     """Test cases for the save method of the BaseModel class."""
 